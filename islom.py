@@ -1,8 +1,23 @@
 import customtkinter as ctk
 import tkinter as tk
-import serial
+from PIL import ImageTk
+import math
+import os
+import queue
 import threading
 import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+
+import xgt_cnet as cnet
+import xgt_values as xv
+from xgt_scan import ScanScheduler, ChangeFilter
+from xgt_link import PRIORITY_WRITE, PRIORITY_READ, PRIORITY_POLL
+from xgt_supervisor import PortSupervisor
+from xgt_capture import CaptureWriter
+from xgt_history import Historian
+import xgt_discover
+import xgt_sprites as sprites
 
 # --- UI SOZLAMALARI ---
 ctk.set_appearance_mode("Dark")
@@ -23,13 +38,28 @@ LANG = {
         "val_ph": "Value (Hex, e.g., 0001)",
         "btn_read": "READ DATA",
         "btn_write": "WRITE DATA",
+        "btn_read_all": "READ ALL",
+        "mon_check": "Monitor mode (X/Y)",
+        "btn_poll_start": "START POLL",
+        "btn_poll_stop": "STOP POLL",
+        "btn_export": "EXPORT CSV",
+        "sys_export": "SYSTEM: History exported ->",
+        "log_filter_ph": "Filter (address / text)",
         "bcc_check": "Enable BCC (lowercase command)",
         "terminal": "LIVE TERMINAL (Request/Response & Errors)",
         "sys_conn": "SYSTEM: Successfully connected ->",
         "sys_disconn": "SYSTEM: Disconnected.",
         "err_cable": "ERROR: Check the cable! ->",
         "err_timeout": "[RES]  < ERROR: No response from PLC (Timeout)",
-        "err_lost": "CONNECTION LOST: Port disconnected! Program saved from crash."
+        "err_lost": "CONNECTION LOST: Port disconnected! Program saved from crash.",
+        "sys_reconn_wait": "SYSTEM: Waiting for the port to return, polling will resume...",
+        "sys_reconn": "SYSTEM: Reconnected ->",
+        "err_capture": "WARNING: Frame capture disabled ->",
+        "btn_scan": "FIND PLC",
+        "sys_scan": "SYSTEM: Searching for PLCs on",
+        "sys_found": "SYSTEM: PLC found ->",
+        "sys_scan_done": "SYSTEM: Search finished, stations found:",
+        "err_scan_busy": "ERROR: Disconnect before searching."
     },
     "KR": {
         "title": "LS XGT PLC - 범용 진단 프로그램 (Cnet)",
@@ -44,13 +74,28 @@ LANG = {
         "val_ph": "값 (Hex, 예: 0001)",
         "btn_read": "데이터 읽기",
         "btn_write": "데이터 쓰기",
+        "btn_read_all": "전체 읽기",
+        "mon_check": "모니터 모드 (X/Y)",
+        "btn_poll_start": "주기 읽기 시작",
+        "btn_poll_stop": "주기 읽기 정지",
+        "btn_export": "CSV 내보내기",
+        "sys_export": "시스템: 이력 내보내기 완료 ->",
+        "log_filter_ph": "필터 (주소 / 텍스트)",
         "bcc_check": "BCC 활성화 (소문자 명령)",
         "terminal": "라이브 터미널 (요청/응답 및 오류)",
         "sys_conn": "시스템: 연결 성공 ->",
         "sys_disconn": "시스템: 연결이 해제되었습니다.",
         "err_cable": "오류: 케이블을 확인하세요! ->",
         "err_timeout": "[RES]  < 오류: PLC 응답 없음 (시간 초과)",
-        "err_lost": "연결 끊김: 포트 통신 단절! 프로그램 충돌이 방지되었습니다."
+        "err_lost": "연결 끊김: 포트 통신 단절! 프로그램 충돌이 방지되었습니다.",
+        "sys_reconn_wait": "시스템: 포트 복귀 대기 중, 주기 읽기가 재개됩니다...",
+        "sys_reconn": "시스템: 재연결 성공 ->",
+        "err_capture": "경고: 프레임 기록이 비활성화되었습니다 ->",
+        "btn_scan": "PLC 찾기",
+        "sys_scan": "시스템: PLC 검색 중 ->",
+        "sys_found": "시스템: PLC 발견 ->",
+        "sys_scan_done": "시스템: 검색 완료, 발견된 국번 수:",
+        "err_scan_busy": "오류: 검색 전에 연결을 해제하세요."
     }
 }
 
@@ -63,6 +108,7 @@ class VirtualKeyboard(ctk.CTkToplevel):
         self.title("HMI Full Keyboard")
         self.geometry("950x350")
         self.attributes("-topmost", True)
+        self.protocol("WM_DELETE_WINDOW", self.hide)   # yopilmaydi, faqat yashiriladi
         self.target_entry = target_entry
 
         self.is_shifted = False
@@ -85,6 +131,8 @@ class VirtualKeyboard(ctk.CTkToplevel):
         ]
 
         self.btn_widgets = {}
+        self.btn_labels = {}       # tugma -> hozir ko'rsatilgan matn
+        self.mode_colors = {}      # SHIFT/CapsLock tugmasi -> hozirgi rang
         self.build_keyboard()
 
         self.update_idletasks()
@@ -135,20 +183,39 @@ class VirtualKeyboard(ctk.CTkToplevel):
                 else:
                     btn.pack(side="left", padx=2, expand=True, fill="both")
                 self.btn_widgets[(r_idx, c_idx)] = btn
+                self.btn_labels[(r_idx, c_idx)] = key_text
 
     def refresh_labels(self):
-        for (r, c), btn in self.btn_widgets.items():
-            char = self.get_current_char(r, c)
-            btn.configure(text=char)
-            if char == 'CapsLock':
-                btn.configure(fg_color="#2FA572" if self.is_caps else "#555")
-            elif char == 'SHIFT':
-                btn.configure(fg_color="#2FA572" if self.is_shifted else "#555")
+        """Faqat matni yoki rangi haqiqatan o'zgargan tugmalar qayta sozlanadi"""
+        for pos, btn in self.btn_widgets.items():
+            char = self.get_current_char(*pos)
+            if char != self.btn_labels[pos]:
+                btn.configure(text=char)
+                self.btn_labels[pos] = char
+            if char in ('CapsLock', 'SHIFT'):
+                active = self.is_caps if char == 'CapsLock' else self.is_shifted
+                color = "#2FA572" if active else "#555"
+                if self.mode_colors.get(pos, "#555") != color:
+                    btn.configure(fg_color=color)
+                    self.mode_colors[pos] = color
+
+    def retarget(self, target_entry):
+        """Mavjud klaviaturani boshqa maydonga ulab ko'rsatish"""
+        self.target_entry = target_entry
+        if self.state() != "normal":
+            self.deiconify()
+        self.lift()
+
+    def hide(self):
+        if self.is_shifted:
+            self.is_shifted = False
+            self.refresh_labels()
+        self.withdraw()
 
     def handle_key(self, r, c):
         key = self.get_current_char(r, c)
         if key == 'CLOSE' or key == 'ENTER':
-            self.destroy()
+            self.hide()
         elif key == 'BACKSPACE':
             current = self.target_entry.get()
             self.target_entry.delete(0, 'end')
@@ -174,51 +241,128 @@ class VirtualKeyboard(ctk.CTkToplevel):
 # ==========================================
 # 2. VIZUALIZATSIYA
 # ==========================================
+class AnimationClock:
+    """
+    Hamma vidjetlar uchun bitta kadr soati. Harakatlanayotgan vidjet add() bilan
+    qo'shiladi; har kadrda uning step(dt) chaqiriladi (dt - o'tgan vaqt, s).
+    step() False qaytarsa vidjet ro'yxatdan chiqadi, hech kim harakatlanmasa
+    soat to'xtaydi. Maqsad qanchalik tez o'zgarmasin, after() zanjiri bitta.
+    """
+    FPS = 60
+
+    def __init__(self, fps=FPS):
+        self.interval_ms = max(1, round(1000 / fps))
+        self.items = set()
+        self.host = None
+        self._job = None
+        self._last = None
+        self.frames = 0
+
+    @property
+    def running(self):
+        return self._job is not None
+
+    def add(self, item):
+        self.items.add(item)
+        if self._job is None:
+            self.host = item.winfo_toplevel()
+            self._last = time.perf_counter()
+            self._job = self.host.after(self.interval_ms, self._tick)
+
+    def discard(self, item):
+        self.items.discard(item)
+
+    def _tick(self):
+        now = time.perf_counter()
+        dt = now - self._last
+        self._last = now
+        self.frames += 1
+        for item in list(self.items):
+            try:
+                moving = item.step(dt)
+            except tk.TclError:             # vidjet yo'q qilingan
+                moving = False
+            if not moving:
+                self.items.discard(item)
+        self._job = self.host.after(self.interval_ms, self._tick) if self.items else None
+
+
+ANIMATION = AnimationClock()
+
+
 class CraneTrackWidget(ctk.CTkFrame):
-    def __init__(self, master, width=600, height=350, **kwargs):
+    SMOOTHING = 0.08      # s: maqsadga yaqinlashish vaqt doimiysi (~5 marta = yetib borish)
+
+    def __init__(self, master, width=600, height=350, clock=ANIMATION, **kwargs):
         super().__init__(master, fg_color="#2b2b2b", **kwargs)
+        self.clock = clock
         self.width = width
         self.height = height
 
         self.canvas = tk.Canvas(self, width=self.width, height=self.height, bg="#2b2b2b", highlightthickness=0)
         self.canvas.pack(expand=True, fill="both", padx=10, pady=10)
 
-        self.current_x = 150
+        self.current_x = 150      # aniq (kasr) holat
+        self.drawn_x = 150        # kanvasdagi butun piksel holati
         self.target_x = 150
         self.draw_static_rails()
         self.build_crane_assembly()
 
     def draw_static_rails(self):
-        self.canvas.create_line(20, 30, self.width-20, 30, fill="#666666", width=2)
-        self.canvas.create_line(20, self.height-30, self.width-20, self.height-30, fill="#666666", width=2)
+        # Yo'nalish ramkasi rasmi 90° ga burilib, kanvasga bir marta moslanadi
+        try:
+            self.rails_photo = ImageTk.PhotoImage(
+                sprites.fit_image(sprites.SLIDE_FIXTURE, self.width, self.height, rotate=90))
+        except OSError:
+            self.rails_photo = None
+            self.canvas.create_line(20, 30, self.width-20, 30, fill="#666666", width=2)
+            self.canvas.create_line(20, self.height-30, self.width-20, self.height-30, fill="#666666", width=2)
+            return
+        self.canvas.create_image(0, 0, anchor="nw", image=self.rails_photo)
 
     def build_crane_assembly(self):
         self.canvas.delete("crane_tag")
-        x = self.current_x
+        x = self.drawn_x
+        if self.rails_photo is not None:
+            # Ko'prik ikki panjarali relsning o'rtalari orasida
+            top, bottom = round(self.height * 0.2), round(self.height * 0.8)
+            try:
+                block = sprites.fit_image(sprites.CRANE_BLOCK, 14, bottom - top)
+            except OSError:
+                block = None
+            if block is not None:
+                self.block_photo = ImageTk.PhotoImage(block)
+                self.canvas.create_image(x, top, anchor="n", image=self.block_photo, tags="crane_tag")
+                return
         self.canvas.create_rectangle(
             x - 6, 35, x + 6, self.height-35,
             outline="#D49A00", fill="#FFC000", tags="crane_tag", width=2
         )
 
     def set_position(self, target_x):
+        """Faqat maqsad yangilanadi; harakatni umumiy soat davom ettiradi"""
         self.target_x = max(30, min(self.width - 30, target_x))
-        self._animate()
+        if self.target_x != self.current_x:
+            self.clock.add(self)
 
-    def _animate(self):
-        if self.current_x == self.target_x:
-            return
-        step = 5
-        direction = 1 if self.target_x > self.current_x else -1
-        if abs(self.target_x - self.current_x) <= step:
-            dx = self.target_x - self.current_x
+    def step(self, dt):
+        """Vaqtga asoslangan silliq yaqinlashish; yetib borganda False"""
+        remaining = self.target_x - self.current_x
+        if abs(remaining) < 0.5:
             self.current_x = self.target_x
         else:
-            dx = step * direction
-            self.current_x += dx
-        self.canvas.move("crane_tag", dx, 0)
-        self.after(15, self._animate)
+            self.current_x += remaining * (1.0 - math.exp(-dt / self.SMOOTHING))
+        x = round(self.current_x)
+        if x != self.drawn_x:
+            self.canvas.move("crane_tag", x - self.drawn_x, 0)
+            self.drawn_x = x
+        return self.current_x != self.target_x
 
 class ModernLED(ctk.CTkFrame):
+    # Yorug'lik gradienti ranglari bir marta hisoblanadi (tashqaridan ichkariga)
+    GLOW = [(i, f"#{int(255 * (0.3 + 0.7 * (i / 10))):02x}ff{int(255 * (0.3 + 0.7 * (i / 10))):02x}")
+            for i in range(10, 0, -1)]
+
     def __init__(self, master, text="LED", size=70, **kwargs):
         super().__init__(master, fg_color="transparent", **kwargs)
         self.size = size
@@ -226,35 +370,28 @@ class ModernLED(ctk.CTkFrame):
         self.state = False
         self.canvas = tk.Canvas(self, width=size, height=size+20, bg="#2b2b2b", highlightthickness=0)
         self.canvas.pack()
-        self.draw_off()
-
-    def draw_off(self):
-        self.canvas.delete("all")
-        cx = cy = self.size // 2
-        self.canvas.create_oval(cx-5, cy-5, cx+self.size//2+5, cy+self.size//2+5, fill="#1a1a1a", outline="")
-        self.canvas.create_oval(cx-self.size//2+5, cy-self.size//2+5, cx+self.size//2-5, cy+self.size//2-5, fill="#3a3a3a", outline="#888", width=2)
-        self.canvas.create_oval(cx-12, cy-12, cx+12, cy+12, fill="#555", outline="#666", width=1)
-        self.canvas.create_text(cx, cy+30, text=self.text, fill="white", font=("Arial", 10, "bold"))
+        self.build()
 
-    def draw_on(self):
-        self.canvas.delete("all")
+    def build(self):
+        """Ikkala holat ham bir marta chiziladi; almashtirishda faqat ko'rinish o'zgaradi"""
         cx = cy = self.size // 2
         self.canvas.create_oval(cx-5, cy-5, cx+self.size//2+5, cy+self.size//2+5, fill="#1a1a1a", outline="")
         self.canvas.create_oval(cx-self.size//2+5, cy-self.size//2+5, cx+self.size//2-5, cy+self.size//2-5, fill="#3a3a3a", outline="#888", width=2)
-        for i in range(10, 0, -1):
-            alpha = int(255 * (0.3 + 0.7 * (i/10)))
-            color = f"#{alpha:02x}ff{alpha:02x}"
-            self.canvas.create_oval(cx-i+5, cy-i+5, cx+i-5, cy+i-5, fill=color, outline="")
+        self.canvas.create_oval(cx-12, cy-12, cx+12, cy+12, fill="#555", outline="#666", width=1, tags="off")
+        for i, color in self.GLOW:
+            self.canvas.create_oval(cx-i+5, cy-i+5, cx+i-5, cy+i-5, fill=color, outline="", tags="on", state="hidden")
         self.canvas.create_text(cx, cy+30, text=self.text, fill="white", font=("Arial", 10, "bold"))
 
     def set_state(self, on):
         if on != self.state:
             self.state = on
-            if on: self.draw_on()
-            else: self.draw_off()
+            self.canvas.itemconfigure("on", state="normal" if on else "hidden")
+            self.canvas.itemconfigure("off", state="hidden" if on else "normal")
 
 class ModernAngleMeter(ctk.CTkFrame):
-    def __init__(self, master, title="LEFT", txt_left="OUT", txt_right="IN", width=220, height=180, **kwargs):
+    READY_POLL_MS = 15      # fon oqimida burilgan rasmlarni tekshirish davri
+    def __init__(self, master, title="LEFT", txt_left="OUT", txt_right="IN", width=220, height=180,
+                 resolution=1.0, cache_size=120, **kwargs):
         super().__init__(master, fg_color="transparent", **kwargs)
         self.width = width
         self.height = height
@@ -263,6 +400,19 @@ class ModernAngleMeter(ctk.CTkFrame):
         self.txt_right = txt_right
         self.angle = 0
 
+        # Fixture rasmi: bir marta yuklanib, vidjet kengligiga kichraytiriladi
+        try:
+            self.sprites = sprites.RotatedSprites(sprites.fit_image(sprites.ANGLE_FIXTURE, width - 20),
+                                                  resolution, cache_size)
+        except OSError:
+            self.sprites = None          # rasm yo'q - vektor chizma
+        self.photos = OrderedDict()      # kalit -> PhotoImage (Tk oqimida yaratiladi)
+        self.cache_size = cache_size
+        self.sprite_key = None           # ko'rsatilishi kerak bo'lgan kalit
+        # Fon oqimi tayyor kalitlarni shu navbatga qo'yadi; Tk taymeri o'qiydi
+        self.ready = queue.SimpleQueue()
+        self.ready_timer = None
+
         self.canvas = tk.Canvas(self, width=self.width, height=self.height, bg="#2b2b2b", highlightthickness=0)
         self.canvas.pack(expand=True, pady=10)
         self.draw_fixture()
@@ -276,9 +426,14 @@ class ModernAngleMeter(ctk.CTkFrame):
         self.canvas.create_text(cx, 15, text=self.title_text, fill="white", font=("Arial", 11, "bold"))
         self.canvas.create_rectangle(cx - 35, 25, cx + 35, 45, fill="#999999", outline="")
         self.angle_text_id = self.canvas.create_text(cx, 35, text=f"{self.angle}°", fill="black", font=("Arial", 12, "bold"))
-        self.canvas.create_rectangle(0, 55, self.width, 70, fill="#ECA400", outline="#B87300", width=2)
-        self.canvas.create_rectangle(cx - 45, 45, cx + 45, 60, fill="#C0C0C0", outline="#888")
         self.canvas.create_rectangle(cx - 4, 70, cx + 4, 110, fill="#888888", outline="#555")
+        if self.sprites is None:
+            self.canvas.create_rectangle(0, 55, self.width, 70, fill="#ECA400", outline="#B87300", width=2)
+            self.canvas.create_rectangle(cx - 45, 45, cx + 45, 60, fill="#C0C0C0", outline="#888")
+        else:
+            self.sprite_id = self.canvas.create_image(cx, 62, anchor="center")
+            # Birinchi rasm darhol: mainloop hali ishlamayapti, fon natijasini kutib bo'lmaydi
+            self.show_sprite(self.sprites.key(self.angle), wait=True)
         self.canvas.create_polygon(cx - 50, 120, cx + 50, 120, cx + 40, 110, cx - 40, 110, fill="#A0A0A0", outline="#666")
         self.canvas.create_rectangle(cx - 65, 120, cx + 65, 135, fill="#222222", outline="#444")
         self.canvas.create_rectangle(cx - 55, 135, cx - 25, 140, fill="#FFFFCC", outline="")
@@ -288,11 +443,102 @@ class ModernAngleMeter(ctk.CTkFrame):
     def set_angle(self, angle):
         self.angle = angle % 360
         self.canvas.itemconfig(self.angle_text_id, text=f"{self.angle}°")
+        if self.sprites is not None:
+            self.show_sprite(self.sprites.key(self.angle))
+
+    def show_sprite(self, key, wait=False):
+        """
+        Keshdan olib almashtirish; yo'q bo'lsa fon oqimida tayyorlanadi, hozircha eskisi
+        qoladi (wait=True - shu yerning o'zida tayyorlanadi).
+        """
+        self.sprite_key = key
+        photo = self.photos.get(key)
+        if photo is None:
+            image = self.sprites.get(key)
+            if image is None and wait:
+                image = self.sprites.render(key)
+            if image is None:
+                self.sprites.request(key, self.ready.put)
+                if self.ready_timer is None:
+                    self.ready_timer = self.after(self.READY_POLL_MS, self._poll_ready)
+                return
+            photo = self.photos[key] = ImageTk.PhotoImage(image)
+            while len(self.photos) > self.cache_size:
+                self.photos.popitem(last=False)
+        else:
+            self.photos.move_to_end(key)
+        self.canvas.itemconfig(self.sprite_id, image=photo)
+
+    def _poll_ready(self):
+        """Tk oqimida: fon oqimi tayyorlagan kalitlarni olish; kutilayotgani bo'lsa ko'rsatish"""
+        self.ready_timer = None
+        keys = set()
+        while True:
+            try:
+                keys.add(self.ready.get_nowait())
+            except queue.Empty:
+                break
+        if self.sprite_key in keys:
+            self.show_sprite(self.sprite_key)     # kerak bo'lsa taymerni o'zi qayta qo'yadi
+        elif self.sprite_key not in self.photos and self.ready_timer is None:
+            self.ready_timer = self.after(self.READY_POLL_MS, self._poll_ready)
 
 # ==========================================
-# 3. ASOSIY DASTUR
+# 3. LIVE TERMINAL (chegaralangan bufer)
+# ==========================================
+class TerminalLog:
+    """
+    Log yozuvlari uchun qat'iy o'lchamli halqa bufer. Istalgan oqimdan append()
+    qilinadi; vidjetga faqat oxirgi ko'rinadigan oyna (filtr bo'yicha) chiziladi.
+    """
+    CAPACITY = 20000        # xotirada saqlanadigan yozuvlar
+    VISIBLE = 300           # vidjetga chiqariladigan oxirgi qatorlar
+
+    def __init__(self, capacity=CAPACITY):
+        self.records = deque(maxlen=capacity)     # (matn, rang, tur)
+        self.lock = threading.Lock()
+        self.total = 0
+        self.dirty = False
+
+    def append(self, message, color="white", kind=None):
+        with self.lock:
+            self.records.append((message, color, kind))
+            self.total += 1
+            self.dirty = True
+
+    @property
+    def dropped(self):
+        return self.total - len(self.records)
+
+    def window(self, text_filter="", kind=None, limit=VISIBLE):
+        """Filtrga mos oxirgi limit ta yozuv (eskisidan yangisiga)"""
+        with self.lock:
+            records = list(self.records)
+            self.dirty = False
+        text_filter = text_filter.strip().upper()
+        if not text_filter and kind is None:
+            return records[-limit:]
+        result = []
+        for record in reversed(records):
+            if kind is not None and record[2] != kind:
+                continue
+            if text_filter and text_filter not in record[0].upper():
+                continue
+            result.append(record)
+            if len(result) >= limit:
+                break
+        result.reverse()
+        return result
+
+
+# ==========================================
+# 4. ASOSIY DASTUR
 # ==========================================
 class PLCTesterApp(ctk.CTk):
+    LOG_FLUSH_MS = 250      # terminal vidjeti sekundiga ~4 marta yangilanadi
+    CAPTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "captures")
+    HISTORY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "history")
+
     def __init__(self):
         super().__init__()
         self.current_lang = "EN"
@@ -300,22 +546,75 @@ class PLCTesterApp(ctk.CTk):
         self.attributes("-fullscreen", True)
         self.bind("<Escape>", lambda e: self.destroy())
 
-        self.serial_port = None
+        self.supervisor = None   # portning egasi; uzilishda qayta ochadi (xgt_supervisor)
         self.kb_window = None
+        self.kb_latency = {}     # 'build'/'show' -> oxirgi ochilish vaqtlari (s)
 
         # Manzillar
         self.led_addr = ctk.StringVar(value="%MW200")
         self.crane_addr = ctk.StringVar(value="%MW210")
         self.angle_addr_left = ctk.StringVar(value="%MW220")
         self.angle_addr_right = ctk.StringVar(value="%MW222")
-
+        self.rsb_gap = 4   # rSB rejasida o'qib yuboriladigan ortiqcha word lar
+        self.monitors = {}       # stansiya -> MonitorTable
+        self.served = {}         # teg -> 'RSS' / 'RSB' / 'MON#..' (lbl_served da ko'rsatilgan)
+        self.widget_tags = {}    # teg -> vidjet yangilovchisi (bind_widgets)
+        self.stats_job = None    # refresh_scan_stats after() zanjiri (bitta)
+        self.monitor_var = ctk.BooleanVar(value=False)
+        # Tayyor kadrlar: stansiya, BCC yoki manzil o'zgargandagina qayta quriladi
+        self.tag_table = cnet.TagTable()
+
+        # Davriy o'qish: vidjet turi bo'yicha davr (s)
+        self.scan_periods = {"led": 0.1, "crane": 0.05, "angle": 0.5}
+        self.scanner = ScanScheduler(self.build_plan, self.execute_plan, on_error=self.scan_error)
+        # Vidjetga faqat haqiqiy o'zgarish boradi: (deadband, foizmi, eng uzoq jimlik s)
+        self.deadbands = {"led": (0, False, 2.0), "crane": (1, False, 1.0), "angle": (0.5, True, 2.0)}
+        self.changes = ChangeFilter()
+
+        self.terminal = TerminalLog()
+        # Har bir TX/RX kadr doim ikkilik faylga yoziladi (xgt_capture.py bilan o'qiladi).
+        # Papkaga yozib bo'lmasa (faqat o'qiladigan o'rnatish) dastur yozuvsiz ishlaydi
+        try:
+            self.capture = CaptureWriter(self.CAPTURE_DIR)
+        except OSError as e:
+            self.capture = None
+            self.log_message(f"{LANG[self.current_lang]['err_capture']} {e}", "yellow")
+        # O'qilgan har bir qiymat tarixda qoladi (xotira oldindan belgilangan)
+        self.history = Historian()
         self.setup_ui()
         self.update_texts()
+        self.after(self.LOG_FLUSH_MS, self.flush_log)
+
+    @property
+    def io(self):
+        """Joriy IOWorker yoki None (uzilgan / qayta ulanish kutilmoqda)"""
+        return self.supervisor.io if self.supervisor else None
+
+    def destroy(self):
+        self.scanner.stop()
+        if self.supervisor:
+            self.supervisor.close()
+        if self.capture:
+            self.capture.close()
+        super().destroy()
 
     def open_keyboard(self, event, entry_widget):
+        """Klaviatura bir marta yaratiladi, keyin faqat ko'rsatilib, yangi maydonga ulanadi"""
+        started = time.perf_counter()
         if self.kb_window and self.kb_window.winfo_exists():
-            self.kb_window.destroy()
-        self.kb_window = VirtualKeyboard(self, entry_widget)
+            self.kb_window.retarget(entry_widget)
+            kind = "show"
+        else:
+            self.kb_window = VirtualKeyboard(self, entry_widget)
+            kind = "build"
+        # Kechikish: bosishdan navbatdagi chizish tugaguncha
+        self.after_idle(lambda: self.record_kb_latency(kind, time.perf_counter() - started))
+
+    def record_kb_latency(self, kind, seconds):
+        self.kb_latency[kind] = self.kb_latency.get(kind, ())[-19:] + (seconds,)
+        text = "   ".join(f"KB {k}: last {v[-1] * 1000:.1f}ms avg {sum(v) / len(v) * 1000:.1f}ms (n={len(v)})"
+                           for k, v in sorted(self.kb_latency.items()))
+        self.lbl_ui.configure(text=text)
 
     def change_language(self, choice):
         self.current_lang = choice
@@ -335,10 +634,16 @@ class PLCTesterApp(ctk.CTk):
         self.write_val.configure(placeholder_text=lang["val_ph"])
         self.read_btn.configure(text=lang["btn_read"])
         self.write_btn.configure(text=lang["btn_write"])
+        self.read_all_btn.configure(text=lang["btn_read_all"])
+        self.monitor_check.configure(text=lang["mon_check"])
+        self.poll_btn.configure(text=lang["btn_poll_stop"] if self.scanner.running else lang["btn_poll_start"])
+        self.export_btn.configure(text=lang["btn_export"])
+        self.scan_btn.configure(text=lang["btn_scan"])
         self.bcc_check.configure(text=lang["bcc_check"])
         self.lbl_terminal.configure(text=lang["terminal"])
+        self.log_filter.configure(placeholder_text=lang["log_filter_ph"])
         
-        if self.serial_port and self.serial_port.is_open:
+        if self.supervisor:
             self.connect_btn.configure(text=lang["disconnect"])
         else:
             self.connect_btn.configure(text=lang["connect"])
@@ -375,17 +680,24 @@ class PLCTesterApp(ctk.CTk):
 
         self.lbl_station = ctk.CTkLabel(conn_frame, font=("Arial", 12, "bold"))
         self.lbl_station.grid(row=1, column=0, padx=5, sticky="w")
-        self.station_entry = ctk.CTkEntry(conn_frame, width=50)
-        self.station_entry.insert(0, "00")
+        self.station_var = ctk.StringVar(value="00")
+        self.station_entry = ctk.CTkEntry(conn_frame, textvariable=self.station_var, width=50)
         self.station_entry.grid(row=1, column=1, padx=5, sticky="w")
         self.station_entry.bind("<Button-1>", lambda e: self.open_keyboard(e, self.station_entry))
 
         self.bcc_var = ctk.BooleanVar(value=True)
         self.bcc_check = ctk.CTkCheckBox(conn_frame, variable=self.bcc_var)
         self.bcc_check.grid(row=1, column=2, columnspan=2, padx=5, sticky="w")
+        for var in (self.station_var, self.bcc_var):
+            var.trace_add("write", lambda *_: self.sync_tag_table())
+        for var in (self.led_addr, self.crane_addr, self.angle_addr_left, self.angle_addr_right):
+            var.trace_add("write", lambda *_: self.tag_table.clear())
+        self.sync_tag_table()
 
         self.connect_btn = ctk.CTkButton(conn_frame, fg_color="green", command=self.toggle_connection)
         self.connect_btn.grid(row=0, column=4, rowspan=2, padx=10, pady=5, sticky="e")
+        self.scan_btn = ctk.CTkButton(conn_frame, fg_color="#3B6EA5", width=110, command=self.discover_plc)
+        self.scan_btn.grid(row=0, column=5, rowspan=2, padx=(0, 10), pady=5, sticky="e")
 
         # ----- 2-qator: O‘qish/Yozish -----
         rw_frame = ctk.CTkFrame(self)
@@ -416,7 +728,7 @@ class PLCTesterApp(ctk.CTk):
         # ----- 3-qator: Animatsiya manzillari -----
         addr_frame = ctk.CTkFrame(self)
         addr_frame.grid(row=3, column=0, padx=20, pady=5, sticky="ew")
-        addr_frame.grid_columnconfigure((0,1,2,3,4,5,6,7), weight=1)
+        addr_frame.grid_columnconfigure((0,1,2,3,4,5,6,7,8), weight=1)
 
         ctk.CTkLabel(addr_frame, text="LED word:", font=("Arial", 11)).grid(row=0, column=0, padx=2, sticky="w")
         self.entry_led = ctk.CTkEntry(addr_frame, textvariable=self.led_addr, width=80)
@@ -438,13 +750,45 @@ class PLCTesterApp(ctk.CTk):
         self.entry_angle_right.grid(row=0, column=7, padx=2)
         self.entry_angle_right.bind("<Button-1>", lambda e: self.open_keyboard(e, self.entry_angle_right))
 
+        self.read_all_btn = ctk.CTkButton(addr_frame, command=self.read_dashboard, width=100)
+        self.read_all_btn.grid(row=0, column=8, padx=5, pady=5)
+
+        self.monitor_check = ctk.CTkCheckBox(addr_frame, variable=self.monitor_var)
+        self.monitor_check.grid(row=1, column=0, columnspan=2, padx=2, pady=(0, 5), sticky="w")
+        self.lbl_served = ctk.CTkLabel(addr_frame, text="", font=("Consolas", 11), text_color="#AAAAAA")
+        self.lbl_served.grid(row=1, column=2, columnspan=7, padx=2, pady=(0, 5), sticky="w")
+
+        self.poll_btn = ctk.CTkButton(addr_frame, command=self.toggle_polling, width=100, fg_color="#2FA572")
+        self.poll_btn.grid(row=2, column=0, columnspan=2, padx=2, pady=(0, 5), sticky="w")
+        self.lbl_scan = ctk.CTkLabel(addr_frame, text="", font=("Consolas", 11), text_color="#AAAAAA")
+        self.lbl_scan.grid(row=2, column=2, columnspan=7, padx=2, pady=(0, 5), sticky="w")
+        self.export_btn = ctk.CTkButton(addr_frame, command=self.export_history, width=100)
+        self.export_btn.grid(row=3, column=0, columnspan=2, padx=2, pady=(0, 5), sticky="w")
+        self.lbl_stations = ctk.CTkLabel(addr_frame, text="", font=("Consolas", 11), text_color="#AAAAAA")
+        self.lbl_stations.grid(row=3, column=2, columnspan=7, padx=2, pady=(0, 5), sticky="w")
+        self.lbl_ui = ctk.CTkLabel(addr_frame, text="", font=("Consolas", 11), text_color="#AAAAAA")
+        self.lbl_ui.grid(row=4, column=2, columnspan=7, padx=2, pady=(0, 5), sticky="w")
+
         # ----- 4-qator: Terminal -----
         term_frame = ctk.CTkFrame(self)
         term_frame.grid(row=4, column=0, padx=20, pady=5, sticky="nsew")
-        self.lbl_terminal = ctk.CTkLabel(term_frame, font=("Arial", 12, "bold"))
-        self.lbl_terminal.pack(anchor="w", padx=5, pady=2)
+        term_head = ctk.CTkFrame(term_frame, fg_color="transparent")
+        term_head.pack(fill="x", padx=5, pady=2)
+        self.lbl_terminal = ctk.CTkLabel(term_head, font=("Arial", 12, "bold"))
+        self.lbl_terminal.pack(side="left")
+        self.log_kind = ctk.CTkSegmentedButton(term_head, values=["ALL", "NAK", "TIMEOUT", "BCC"], command=lambda _: self.mark_log_dirty())
+        self.log_kind.set("ALL")
+        self.log_kind.pack(side="right", padx=5)
+        self.log_filter = ctk.CTkEntry(term_head, width=180)
+        self.log_filter.pack(side="right", padx=5)
+        self.log_filter.bind("<KeyRelease>", lambda e: self.mark_log_dirty())
+        self.log_filter.bind("<Button-1>", lambda e: self.open_keyboard(e, self.log_filter))
+        self.lbl_log_count = ctk.CTkLabel(term_head, text="", font=("Consolas", 11), text_color="#AAAAAA")
+        self.lbl_log_count.pack(side="right", padx=10)
         self.textbox_log = ctk.CTkTextbox(term_frame, font=("Consolas", 11), text_color="#00FF00", fg_color="black")
         self.textbox_log.pack(fill="both", expand=True, padx=10, pady=5)
+        for color in ("white", "cyan", "green", "red", "yellow"):
+            self.textbox_log.tag_config(color, foreground=color)
 
         # ----- 5-qator: Animatsiyalar -----
         anim_frame = ctk.CTkFrame(self)
@@ -486,181 +830,395 @@ class PLCTesterApp(ctk.CTk):
 
     # ---------- Original main.py arxitekturasi tiklandi ----------
     def calculate_bcc(self, frame_bytes):
-        total = sum(frame_bytes) & 0xFF
-        return f"{total:02X}"
+        return cnet.calculate_bcc(frame_bytes)
 
-    def build_xgt_frame(self, cmd_base, address, data_hex="", use_bcc=True):
-        try:
-            station = int(self.station_entry.get())
-            if station < 0 or station > 31: station = 0
-        except: station = 0
-            
-        station_str = f"{station:02d}" # Original main.py da 02d edi
-        cmd_letter = cmd_base.lower() if use_bcc else cmd_base.upper()
-        cmd_type = "SS"
-        block_count = "01"
-        var_len = f"{len(address):02d}"
-
-        ENQ, EOT = b'\x05', b'\x04'
-
-        parts = [
-            ENQ, station_str.encode('ascii'), cmd_letter.encode('ascii'),
-            cmd_type.encode('ascii'), block_count.encode('ascii'),
-            var_len.encode('ascii'), address.encode('ascii')
-        ]
-        if cmd_base == 'w' and data_hex:
-            parts.append(data_hex.encode('ascii'))
-        parts.append(EOT)
+    def get_station(self):
+        return cnet.parse_station(self.station_var.get())
+
+    def sync_tag_table(self):
+        self.tag_table.configure(self.get_station(), self.bcc_var.get())
 
-        frame_without_bcc = b''.join(parts)
-        if use_bcc:
-            bcc = self.calculate_bcc(frame_without_bcc).encode('ascii')
-            return frame_without_bcc + bcc
-        return frame_without_bcc
+    def normalize_tag(self, text):
+        """'%MW200' -> '0:%MW200' (joriy stansiya bilan), '3:%MW200' o'zgarmaydi"""
+        return cnet.format_tag(*cnet.parse_tag(text, self.get_station()))
+
+    def build_xgt_frame(self, cmd_base, address, data_hex="", use_bcc=True):
+        # address oldida stansiya bo'lishi mumkin: '3:%MW200'
+        station, address = cnet.parse_tag(address, self.get_station())
+        if cmd_base == 'w':
+            return cnet.build_write_frame(station, address, data_hex, use_bcc)
+        return cnet.build_read_frame(station, [address], use_bcc)
 
     def toggle_connection(self):
         lang = LANG[self.current_lang]
-        if self.serial_port and self.serial_port.is_open:
-            self.serial_port.close()
+        if self.supervisor:
+            if self.scanner.running:
+                self.after(0, self.toggle_polling)
+            self.supervisor.close()      # navbatni bekor qiladi, portni yopadi, qayta ulanishni to'xtatadi
+            self.supervisor = None
             self.connect_btn.configure(text=lang["connect"], fg_color="green")
             self.log_message(lang["sys_disconn"], "yellow")
         else:
             try:
                 port = self.port_entry.get()
                 baud = int(self.baud_entry.get())
-                self.serial_port = serial.Serial(port, baudrate=baud, timeout=1.5)
+                # 'COM10' -> serial, 'tcp://192.168.0.50:4001' -> Ethernet gateway
+                supervisor = PortSupervisor(port, baud, capture=self.capture,
+                                            on_connect=self.port_restored, on_lost=self.port_lost)
+                supervisor.open()
+                self.supervisor = supervisor
+                self.reset_link_state()
                 self.connect_btn.configure(text=lang["disconnect"], fg_color="red")
                 self.log_message(f"{lang['sys_conn']} {port} ({baud} bps)", "green")
             except Exception as e:
                 self.log_message(f"{lang['err_cable']} {e}", "red")
 
+    def discover_plc(self):
+        """Hamma serial portlar (+ kiritilgan port) da PLC qidirish; fon oqimida"""
+        lang = LANG[self.current_lang]
+        if self.supervisor:
+            self.log_message(lang["err_scan_busy"], "red")
+            return
+        ports = xgt_discover.candidate_ports()
+        entered = self.port_entry.get().strip()
+        if entered and entered not in ports:
+            ports.append(entered)
+        self.scan_btn.configure(state="disabled")
+        self.log_message(f"{lang['sys_scan']} {', '.join(ports)}", "yellow")
+
+        def found(f):
+            self.log_message(f"{lang['sys_found']} {f.port} {f.baud or '-'} bps, "
+                             f"station {f.station:02d} ({f.bcc}, {f.status})", "green")
+
+        def run():
+            started = time.monotonic()
+            result = xgt_discover.discover(ports, on_found=found)
+            self.after(0, self.discovery_done, result, time.monotonic() - started)
+
+        threading.Thread(target=run, name="xgt-discover", daemon=True).start()
+
+    def discovery_done(self, found, elapsed):
+        """Birinchi topilgan PLC ulanish maydonlariga yoziladi"""
+        self.scan_btn.configure(state="normal")
+        self.log_message(f"{LANG[self.current_lang]['sys_scan_done']} {len(found)} ({elapsed:.1f}s)", "yellow")
+        if not found:
+            return
+        first = found[0]
+        self.port_entry.delete(0, "end")
+        self.port_entry.insert(0, first.port)
+        if first.baud:
+            self.baud_entry.delete(0, "end")
+            self.baud_entry.insert(0, str(first.baud))
+        self.station_var.set(f"{first.station:02d}")
+        self.bcc_var.set(True)
+
+    def reset_link_state(self):
+        for table in self.monitors.values():   # yangi ulanishda monitorlar qayta ro'yxatdan o'tadi
+            table.invalidate()
+        self.changes.reset()
+
+    # PortSupervisor fon oqimidan: skan to'xtamaydi, port qaytishi bilan davom etadi
+    def port_lost(self, error):
+        lang = LANG[self.current_lang]
+        self.log_message(f"{lang['err_lost']} ({error})", "red")
+        self.log_message(lang["sys_reconn_wait"], "yellow")
+
+    def port_restored(self, io):
+        # Rejalashtiruvchi keyingi rejani yangi portga yuborishidan oldin bajariladi
+        self.reset_link_state()
+        outage = self.supervisor.last_outage if self.supervisor else None
+        self.log_message(f"{LANG[self.current_lang]['sys_reconn']} {io.port.name}"
+                         + (f" ({outage:.2f}s)" if outage is not None else ""), "green")
+
     def bytes_to_display(self, data):
-        result = []
-        for b in data:
-            if b == 0x05: result.append('[ENQ]')
-            elif b == 0x06: result.append('[ACK]')
-            elif b == 0x15: result.append('[NAK]')
-            elif b == 0x04: result.append('[EOT]')
-            elif b == 0x03: result.append('[ETX]')
-            elif 32 <= b <= 126: result.append(chr(b))
-            else: result.append(f'[{b:02X}]')
-        return ''.join(result)
+        return cnet.bytes_to_display(data)
 
     def get_error_description(self, error_code):
-        errors = {
-            "0003": "Block count exceeds 16", "0004": "Variable length > 12",
-            "0007": "Invalid data type", "0011": "Data error / invalid variable",
-            "0090": "Monitor not registered", "0190": "Monitor number out of range",
-            "0290": "Monitor registration number out of range", "1132": "Invalid device memory",
-            "1232": "Data size > max (60 words)", "1234": "Extra frame data",
-            "1332": "Data type mismatch in blocks", "1432": "Invalid hex data",
-            "7132": "Variable area exceeded"
-        }
-        return errors.get(error_code, "Unknown error")
+        return cnet.get_error_description(error_code)
 
     # Original send_to_plc mantiqi (animatsiyaga callback qilish bilan birga)
-    def send_to_plc(self, frame, cmd, address, value="", callback=None):
+    def send_to_plc(self, frame, cmd, address, value="", callback=None, priority=PRIORITY_POLL):
+        """
+        Kadrni I/O oqimi navbatiga qo'yish. Darhol Future qaytaradi:
+        natijasi NAK kodi (str) yoki None. Javob I/O oqimida tahlil qilinadi.
+        """
+        done = Future()
+        supervisor = self.supervisor
+        io = supervisor.io if supervisor else None
+        if io is None:
+            done.set_result(None)
+            return done
+
+        self.log_message(f"[ASK]  > {self.bytes_to_display(frame)}", "cyan")
+
+        def finish(f):
+            code = None
+            try:
+                if not f.cancelled():
+                    code = self.handle_response(f.result(), cmd, address, value, callback)
+            except OSError as e:     # SerialException ham, soket xatolari ham
+                supervisor.lost(io, e)   # bir marta yopib, fonda qayta ulanadi
+            finally:
+                done.set_result(code)
+
+        io.submit(frame, priority).add_done_callback(finish)
+        return done
+
+    def handle_response(self, reply, cmd, address, value="", callback=None):
         lang = LANG[self.current_lang]
-        if not self.serial_port or not self.serial_port.is_open:
+        response = reply.frame
+        station = int(reply.request[1:3])
+        if reply.skipped:
+            self.log_message(f"[RES]  < {address} -> station {station} backed off, skipped", "yellow")
+            return
+        if not response:
+            self.log_message(f"[RES]  < {address} -> " + lang["err_timeout"], "red", "TIMEOUT")
             return
 
-        try:
-            self.log_message(f"[ASK]  > {self.bytes_to_display(frame)}", "cyan")
-            self.serial_port.write(frame)
-            time.sleep(0.1)
-
-            use_bcc = self.bcc_var.get()
-            response = bytearray()
-            
-            while True:
-                ch = self.serial_port.read(1)
-                if not ch: break
-                response.extend(ch)
-                if ch == b'\x03': break
-
-            if not response:
-                self.log_message(f"[RES]  < {address} -> " + lang["err_timeout"], "red")
-                return
+        self.log_message(f"[RES]  < {self.bytes_to_display(response)}", "white")
+
+        # Buzilgan / chala kadr qiymat sifatida ishlatilmaydi (IOWorker qayta yuborib bo'lgan)
+        if reply.error:
+            self.log_message(f"[RES]  < {address} -> {reply.error} ({reply.retries} retries) ❌", "red", "BCC")
+            return
+        has_bcc = cnet.frame_uses_bcc(reply.request)
+
+        if len(response) < 1: return
+        first_byte = response[0]
+
+        if first_byte == 0x06: # ACK
+            if cmd in ("r", "y"):
+                min_len = 13 if not has_bcc else 15
+                if len(response) < min_len:
+                    self.log_message("[RES]  < Response too short for read", "red")
+                    return
+
+                try:
+                    values = cnet.split_read_blocks(response, has_bcc)
+                except ValueError as e:
+                    self.log_message(f"[RES]  < {e}", "red")
+                    return
+
+                # address: bitta manzil yoki o'qish rejasi (rSS/rSB)
+                if hasattr(address, "split_values"):
+                    pairs = address.split_values(values)
+                else:
+                    pairs = zip([cnet.parse_tag(address, station)[1]], values)   # '3:%MW200' -> '%MW200'
+
+                pairs = list(pairs)
+                # Hamma qiymat bitta vektorli o'tishda sonlarga o'giriladi
+                try:
+                    numbers = xv.decode_uniform([data for _, data in pairs]).tolist()
+                except ValueError:
+                    numbers = [None] * len(pairs)
+                now = time.time()
+
+                for (addr, data_ascii), val_int in zip(pairs, numbers):
+                    tag = cnet.format_tag(station, addr)
+                    self.log_message(f"[RES]  < {tag} = {data_ascii} -> SUCCESS ✅", "green")
 
-            if use_bcc:
-                self.serial_port.timeout = 0.2
-                bcc_bytes = self.serial_port.read(2)
-                self.serial_port.timeout = 1.5
-                if len(bcc_bytes) == 2:
-                    response.extend(bcc_bytes)
-                    has_bcc = True
-                else: has_bcc = False
-            else: has_bcc = False
-
-            self.log_message(f"[RES]  < {self.bytes_to_display(response)}", "white")
-
-            if len(response) < 1: return
-            first_byte = response[0]
-
-            if first_byte == 0x06: # ACK
-                if cmd == "r":
-                    min_len = 13 if not has_bcc else 15
-                    if len(response) < min_len:
-                        self.log_message("[RES]  < Response too short for read", "red")
-                        return
-
-                    try:
-                        data_cnt_ascii = response[8:10].decode('ascii')
-                        data_bytes = int(data_cnt_ascii, 16)
-                    except: data_bytes = 0
-
-                    data_start = 10
-                    data_end = data_start + data_bytes * 2
-                    etx_pos = len(response) - 3 if has_bcc else len(response) - 1
-
-                    if data_end > etx_pos:
-                        self.log_message("[RES]  < Data length mismatch", "red")
-                        return
-
-                    data_ascii = response[data_start:data_end].decode('ascii')
-                    self.log_message(f"[RES]  < {address} = {data_ascii} -> SUCCESS ✅", "green")
-                    
                     # Animatsiya uchun Callback chaqiramiz
                     if callback:
                         try:
-                            val_int = int(data_ascii, 16)
-                            self.after(0, callback, val_int, address)
+                            if val_int is None:
+                                val_int = int(data_ascii, 16)
+                            if self.changes.accept(tag, val_int):
+                                self.after(0, callback, val_int, tag)
                         except: pass
+                    if val_int is not None:
+                        self.history.record(tag, val_int, now)
+
+            elif cmd == "w":
+                min_len = 7 if not has_bcc else 9
+                if len(response) < min_len:
+                    self.log_message("[RES]  < Response too short for write", "red")
+                    return
 
-                elif cmd == "w":
-                    min_len = 7 if not has_bcc else 9
-                    if len(response) < min_len:
-                        self.log_message("[RES]  < Response too short for write", "red")
-                        return
-
-                    if response[6] == 0x03:
-                        self.log_message(f"[RES]  < {address} <- {value} -> WRITE SUCCESS ✅", "green")
-                    else:
-                        self.log_message("[RES]  < Unexpected write response format", "red")
-
-            elif first_byte == 0x15: # NAK
-                error_start = 1 + 2 + 1 + 2
-                etx_pos = response.find(b'\x03', error_start)
-
-                if etx_pos > error_start:
-                    error_ascii = response[error_start:etx_pos].decode('ascii')
-                    desc = self.get_error_description(error_ascii)
-                    self.log_message(f"[RES]  < {address} -> ERROR (NAK) code: {error_ascii} ({desc}) ❌", "red")
+                if response[6] == 0x03:
+                    self.log_message(f"[RES]  < {address} <- {value} -> WRITE SUCCESS ✅", "green")
                 else:
-                    self.log_message(f"[RES]  < {address} -> ERROR (NAK) ❌", "red")
-            else:
-                self.log_message("[RES]  < Unknown response (no ACK/NAK)", "red")
+                    self.log_message("[RES]  < Unexpected write response format", "red")
+
+            elif cmd == "x":        # Monitor ro'yxatga olish javobi
+                if len(response) >= 7 and response[6] == 0x03:
+                    self.monitor_table(address.station).mark_registered(address.slot, address.station)
+                    self.log_message(f"[RES]  < {address} -> MONITOR REGISTERED ✅", "green")
+                else:
+                    self.log_message("[RES]  < Unexpected monitor response format", "red")
 
-        except serial.SerialException:
-            self.log_message(lang["err_lost"], "red")
-            self.toggle_connection()
+        elif first_byte == 0x15: # NAK
+            error_start = 1 + 2 + 1 + 2
+            etx_pos = response.find(b'\x03', error_start)
+
+            if etx_pos > error_start:
+                error_ascii = response[error_start:etx_pos].decode('ascii')
+                desc = self.get_error_description(error_ascii)
+                self.log_message(f"[RES]  < {address} -> ERROR (NAK) code: {error_ascii} ({desc}) ❌", "red", "NAK")
+                return error_ascii
+            else:
+                self.log_message(f"[RES]  < {address} -> ERROR (NAK) ❌", "red", "NAK")
+        else:
+            self.log_message("[RES]  < Unknown response (no ACK/NAK)", "red")
 
     def read_data(self):
         addr = self.read_addr.get().strip()
         if addr:
-            use_bcc = self.bcc_var.get()
-            frame = self.build_xgt_frame("r", addr, use_bcc=use_bcc)
-            threading.Thread(target=self.send_to_plc, args=(frame, "r", addr, "", self.update_by_address)).start()
+            frame = self.tag_table.read_frame(addr)
+            if not self.scanner.running:     # skan o'z bog'lanishlari bilan ishlaydi
+                self.bind_widgets()
+            self.send_to_plc(frame, "r", addr, "", self.update_by_address, PRIORITY_READ)
+
+    def read_many(self, tags, callback=None):
+        """Teglarni stansiya bo'yicha rSB/rSS kadrlarga rejalashtirib, hammasini I/O navbatiga qo'yish"""
+        use_bcc = self.bcc_var.get()
+        plan = self.build_plan([self.normalize_tag(t) for t in tags])
+        self.show_served(plan)
+        cost = cnet.plan_cost(plan, use_bcc)
+        self.log_message(f"[PLAN] {cost['tags']} tags -> {cost['frames']} frames, "
+                         f"{cost['tx_bytes']}+{cost['rx_bytes']} bytes ({cost['bytes_per_tag']} B/tag, gap={self.rsb_gap})", "yellow")
+        for req in plan:
+            self.read_request(req, use_bcc, callback, PRIORITY_READ)
+
+    def build_plan(self, tags):
+        """tags: '3:%MW200' ko'rinishida (normalize_tag dan o'tgan)"""
+        plan = self.tag_table.plan(tags, self.rsb_gap)
+        if self.monitor_var.get():
+            bound = []
+            for station in sorted({req.station for req in plan}):
+                bound += self.monitor_table(station).bind([req for req in plan if req.station == station])
+            plan = bound
+        return plan
+
+    def monitor_table(self, station):
+        return self.monitors.setdefault(station, cnet.MonitorTable())
+
+    def execute_plan(self, plan):
+        """Rejalashtiruvchi oqimida: rejani navbatga qo'yib, hammasi tugashini kutish"""
+        io = self.io
+        if io is None:
+            return False         # port yo'q / qayta ulanish kutilmoqda: davr o'qilmagan
+        self.show_served(plan, merge=True)
+        pending = [self.read_request(req, self.poll_bcc, self.update_by_address) for req in plan]
+        for done in pending:
+            done.result()
+        return self.io is io     # reja davomida port yo'qolgan bo'lsa - o'qilmagan
+
+    def toggle_polling(self):
+        lang = LANG[self.current_lang]
+        if self.stats_job is not None:
+            self.after_cancel(self.stats_job)
+            self.stats_job = None
+        if self.scanner.running:
+            self.scanner.stop()
+            self.poll_btn.configure(text=lang["btn_poll_start"], fg_color="#2FA572")
+            return
+        self.poll_bcc = self.bcc_var.get()
+        periods = {}
+        for var, kind in ((self.led_addr, "led"), (self.crane_addr, "crane"),
+                          (self.angle_addr_left, "angle"), (self.angle_addr_right, "angle")):
+            addr = var.get().strip()
+            if addr:
+                addr = self.normalize_tag(addr)
+                # Bir manzil bir nechta vidjetda bo'lsa, eng tez davr olinadi
+                periods[addr] = min(periods.get(addr, 60.0), self.scan_periods[kind])
+                self.changes.configure(addr, *self.deadbands[kind])
+        self.scanner.set_tags(periods)
+        self.bind_widgets()
+        self.served = {}
+        self.scanner.start()
+        self.poll_btn.configure(text=lang["btn_poll_stop"], fg_color="#C8504B")
+        self.refresh_scan_stats()
+
+    def scan_error(self, error):
+        """Rejalashtiruvchi oqimidan: sikl to'xtamaydi, xato terminalda ko'rinadi"""
+        self.log_message(f"[SCAN] {type(error).__name__}: {error}", "red")
+
+    def refresh_scan_stats(self):
+        """Har soniyada: har bir teg uchun erishilgan tezlik va o'tkazib yuborilgan davrlar"""
+        self.stats_job = None
+        if not self.scanner.running:
+            return
+        stats = self.scanner.stats()
+        changes = self.changes.stats()
+        self.lbl_scan.configure(text="   ".join(
+            f"{addr}: {st['rate_hz']}Hz/{st['effective_ms']}ms ovr={st['overruns']}"
+            f" sup={changes.get(addr, {}).get('suppressed', 0)}"
+            + (f" skip={st['skipped']}" if st['skipped'] else "") for addr, st in stats.items()))
+        io = self.io
+        if io:
+            link = self.supervisor.stats()
+            outages = (f"PORT: outages={link['outages']} last={link['last_outage_s']}s   "
+                       if link["outages"] else "")
+            self.lbl_stations.configure(text=outages + "   ".join(
+                f"ST{st}: {s['tx_per_s']}tx/s rtt={s['rtt_ms']}ms to={s['timeouts']}"
+                f" tmo={s['timeout_ms']}ms lost={s['lost_s']}s (fixed {s['lost_fixed_s']}s)"
+                f" retry={s['retries']} bcc={s['corrupt']} cut={s['truncated']}"
+                + (f" backoff={s['backoff_s']}s" if s['backoff_s'] else "")
+                for st, s in io.station_stats().items()))
+        self.stats_job = self.after(1000, self.refresh_scan_stats)
+
+    def read_request(self, req, use_bcc, callback=None, priority=PRIORITY_POLL):
+        """
+        Bitta rejadagi so'rovni navbatga qo'yish; monitor bo'lsa kerak paytda X bilan
+        ro'yxatga olish. X va Y bir xil ustuvorlikda ketma-ket turadi.
+        """
+        station = req.station
+        if req.kind != "MON":
+            return self.send_to_plc(req.build_frame(station, use_bcc), "r", req, "", callback, priority)
+        monitors = self.monitor_table(station)
+        if not monitors.is_registered(req.slot, station):
+            self.send_to_plc(req.register_frame(station, use_bcc), "x", req, priority=priority)
+
+        result = Future()
+
+        def check(f):
+            if f.result() != "0090":
+                result.set_result(f.result())
+                return
+            # Monitor not registered -> qayta ro'yxatga olib, bir marta takrorlaymiz
+            monitors.invalidate(req.slot)
+            self.send_to_plc(req.register_frame(station, use_bcc), "x", req, priority=priority)
+            retry = self.send_to_plc(req.build_frame(station, use_bcc), "y", req, "", callback, priority)
+            retry.add_done_callback(lambda r: result.set_result(r.result()))
+
+        self.send_to_plc(req.build_frame(station, use_bcc), "y", req, "", callback, priority).add_done_callback(check)
+        return result
+
+    def show_served(self, plan, merge=False):
+        """
+        Teglar qaysi usulda o'qilayotgani. Skanda har davrda faqat muddati kelgan teglar
+        rejalashtiriladi, shuning uchun merge=True da natijalar jamlanadi va yorliq
+        faqat biror teg usuli o'zgarganda yangilanadi.
+        """
+        served = cnet.describe_plan(plan)
+        if merge:
+            if all(self.served.get(addr) == how for addr, how in served.items()):
+                return
+            served = dict(self.served, **served)
+        self.served = served
+        text = "   ".join(f"{addr}: {how}" for addr, how in served.items())
+        self.after(0, lambda: self.lbl_served.configure(text=text))
+
+    def bind_widgets(self):
+        """
+        Vidjet manzillari so'rov qurilayotgan paytdagi stansiya bilan tegga ('3:%MW200')
+        bog'lanadi. Javob tegi so'rovdagi stansiyadan olinadi, shuning uchun keyin
+        Station maydoni o'zgarsa ham qiymat boshqa stansiyaning vidjetiga tushmaydi.
+        """
+        bindings = {}
+        for var, update in ((self.led_addr, self.update_leds), (self.crane_addr, self.update_crane),
+                            (self.angle_addr_left, self.update_angle_left),
+                            (self.angle_addr_right, self.update_angle_right)):
+            addr = var.get().strip()
+            if addr:
+                bindings.setdefault(self.normalize_tag(addr), update)
+        self.widget_tags = bindings
+        return list(bindings)
+
+    def read_dashboard(self):
+        addrs = self.bind_widgets()
+        if addrs:
+            self.read_many(addrs, self.update_by_address)
 
     def write_data(self):
         addr = self.write_addr.get().strip()
@@ -668,15 +1226,27 @@ class PLCTesterApp(ctk.CTk):
         if addr and val:
             if len(val) % 2 != 0:
                 val = '0' + val
-            use_bcc = self.bcc_var.get()
-            frame = self.build_xgt_frame("w", addr, val, use_bcc=use_bcc)
-            threading.Thread(target=self.send_to_plc, args=(frame, "w", addr, val)).start()
+            frame = self.tag_table.write_frame(addr, val)
+            self.send_to_plc(frame, "w", addr, val, priority=PRIORITY_WRITE)
+
+    def export_history(self):
+        """Butun tarixni (xom namunalar) CSV ga yozish"""
+        os.makedirs(self.HISTORY_DIR, exist_ok=True)
+        path = os.path.join(self.HISTORY_DIR, time.strftime("history_%Y%m%d_%H%M%S.csv"))
+        try:
+            rows = self.history.export_csv(path)
+        except OSError as e:
+            self.log_message(f"[HIST] {e}", "red")
+            return
+        stats = self.history.stats()
+        self.log_message(f"{LANG[self.current_lang]['sys_export']} {path} ({rows} rows, "
+                         f"{stats['tags']} tags, {stats['memory_bytes'] // 1024} KB)", "green")
 
-    def update_by_address(self, value, addr):
-        if addr == self.led_addr.get(): self.update_leds(value)
-        elif addr == self.crane_addr.get(): self.update_crane(value)
-        elif addr == self.angle_addr_left.get(): self.update_angle_left(value)
-        elif addr == self.angle_addr_right.get(): self.update_angle_right(value)
+    def update_by_address(self, value, tag):
+        """tag - javob kelgan so'rovning stansiyasi bilan ('3:%MW200'), jonli Station maydoni emas"""
+        update = self.widget_tags.get(tag)
+        if update is not None:
+            update(value)
 
     def update_leds(self, value):
         self.left_led.set_state(bool(value & 1))
@@ -694,9 +1264,41 @@ class PLCTesterApp(ctk.CTk):
     def update_angle_right(self, value):
         self.angle_meter_right.set_angle(value)
 
-    def log_message(self, message, color="white"):
-        self.textbox_log.insert("end", message + "\n")
-        self.textbox_log.see("end")
+    def log_message(self, message, color="white", kind=None):
+        """Istalgan oqimdan chaqirish mumkin: faqat buferga yoziladi, vidjet flush_log da yangilanadi"""
+        self.terminal.append(message, color, kind)
+
+    def mark_log_dirty(self):
+        self.terminal.dirty = True
+
+    def flush_log(self):
+        """Tk oqimida davriy: buferdagi ko'rinadigan oynani vidjetga bir martada chiqarish"""
+        try:
+            # Operator yuqoriga aylantirib o'qiyotgan bo'lsa, oynani qimirlatmaymiz
+            at_bottom = self.textbox_log.yview()[1] >= 0.999
+            if self.terminal.dirty and at_bottom:
+                kind = self.log_kind.get()
+                records = self.terminal.window(self.log_filter.get(), None if kind == "ALL" else kind)
+                box = self.textbox_log
+                box.delete("1.0", "end")
+                # Bir xil rangdagi ketma-ket qatorlar bitta insert bilan
+                run, run_color = [], None
+                for message, color, _ in records:
+                    if color != run_color and run:
+                        box.insert("end", "\n".join(run) + "\n", run_color)
+                        run = []
+                    run.append(message)
+                    run_color = color
+                if run:
+                    box.insert("end", "\n".join(run) + "\n", run_color)
+                box.see("end")
+                dropped = self.terminal.dropped
+                self.lbl_log_count.configure(text=f"{self.terminal.total} lines" + (f" ({dropped} rotated)" if dropped else ""))
+        finally:
+            # Yozuv buferi ham shu taymer bilan diskka: nosozlikda oxirgi kadrlar yo'qolmaydi
+            if self.capture:
+                self.capture.flush()
+            self.after(self.LOG_FLUSH_MS, self.flush_log)
 
 if __name__ == "__main__":
     app = PLCTesterApp()
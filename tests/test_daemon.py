@@ -0,0 +1,50 @@
+# ------------------------------------------------------------
+# Daemon simulyatorga qarshi (pty): port yo'q paytdagi davrlar
+# o'qilgan emas, o'tkazib yuborilgan (skipped) deb hisoblanadi va
+# chiqishga TIMEOUT qatorlari yozilmaydi.
+#   python -m pytest -q tests
+# ------------------------------------------------------------
+import argparse
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from xgt_daemon import Daemon, Output
+from xgt_sim import PlcSimulator
+
+pytestmark = pytest.mark.skipif(not hasattr(os, "openpty"), reason="needs a pty")
+
+
+def make_daemon(port):
+    args = argparse.Namespace(port=port, baud=115200, station=0, bcc=True, monitor=False, gap=4,
+                              changes_only=False, deadband=0.0, max_interval=60.0)
+    return Daemon(args, [("0:%MW200", 0.02, None)], Output(io.StringIO(), "jsonl"))
+
+
+def test_cycles_without_port_are_skipped_not_read():
+    sim = PlcSimulator(stations=[0])
+    sim.memory.set("%MW200", 0x1234)
+    daemon = make_daemon(sim.start_pty())
+    try:
+        daemon.scanner.start()                           # port hali ochilmagan
+        time.sleep(0.2)
+        before = daemon.scanner.stats()["0:%MW200"]
+        assert before["skipped"] > 0 and before["reads"] == 0
+        assert daemon.output.rows == 0 and daemon.errors == 0
+
+        assert daemon.supervisor.connect()
+        time.sleep(0.2)
+        after = daemon.scanner.stats()["0:%MW200"]
+        assert after["reads"] > 0 and after["rate_hz"] > 0
+        assert after["skipped"] - before["skipped"] <= 1   # ulanish oralig'idagi bitta davr
+        assert daemon.output.rows == after["reads"]
+        assert '"status":"OK","value":4660' in daemon.output.stream.getvalue()
+    finally:
+        daemon.scanner.stop()
+        daemon.supervisor.close()
+        sim.stop()
@@ -0,0 +1,115 @@
+# ------------------------------------------------------------
+# IOWorker simulyatorga qarshi (pty): moslashuvchan timeout, buzilgan
+# javoblarni qayta yuborish, PLC javob vaqti o'zgarganda kechikkan
+# javob keyingi so'rovga berilmasligi, buzilgan portda to'xtash.
+#   python -m pytest -q tests
+# ------------------------------------------------------------
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+import xgt_cnet as cnet
+from xgt_link import IOWorker, MAX_RETRIES, PRIORITY_POLL, TimeoutEstimator
+from xgt_sim import PlcSimulator
+from xgt_transport import open_transport
+
+pytestmark = pytest.mark.skipif(not hasattr(os, "openpty"), reason="needs a pty")
+
+VALUES = {"%MW200": 0x1111, "%MW300": 0x2222}
+
+
+@pytest.fixture
+def bus():
+    sim = PlcSimulator(stations=[0], scan_ms=2)
+    for name, value in VALUES.items():
+        sim.memory.set(name, value)
+    io = IOWorker(open_transport(sim.start_pty(), 115200, timeout=cnet.READ_SLICE), name="test-io")
+    yield sim, io
+    io.close()
+    sim.stop()
+
+
+def test_estimator_backs_off_to_response_timeout():
+    estimator = TimeoutEstimator()
+    estimator.sample(0.004)
+    short = estimator.allowance()
+    assert short < 0.1
+    for _ in range(20):
+        estimator.timed_out()
+    assert estimator.allowance() == cnet.RESPONSE_TIMEOUT   # zaxira shiftga yetadi (MAX_PENALTY yo'q)
+    estimator.sample(0.004)
+    assert estimator.allowance() == pytest.approx(short, rel=0.5)
+
+
+def test_unseen_station_uses_bus_estimate():
+    bus, station = TimeoutEstimator(), TimeoutEstimator()
+    bus.sample(0.2)
+    assert station.allowance(bus) == pytest.approx(bus.allowance())
+
+
+def read(io, address):
+    frame = cnet.build_read_frame(0, [address], True)
+    reply = io.submit(frame, PRIORITY_POLL).result()
+    return cnet.decode_response(reply.request, reply.frame, reply.complete)
+
+
+def test_slowdown_never_returns_other_tags_value(bus):
+    sim, io = bus
+    for i in range(20):                  # qisqa RTT o'rganiladi
+        address = "%MW200" if i % 2 else "%MW300"
+        assert int(read(io, address).blocks[0], 16) == VALUES[address]
+    sim.scan = 0.12                      # PLC skani 2 ms -> 120 ms
+    acked = 0
+    for i in range(20):
+        address = "%MW200" if i % 2 else "%MW300"
+        decoded = read(io, address)
+        if decoded.status == "ACK":
+            acked += 1
+            assert int(decoded.blocks[0], 16) == VALUES[address], f"read {i}: {address}"
+    assert acked >= 19
+    assert io.station_stats()[0]["late"] >= 1
+
+
+def test_broken_port_fails_queue_once(bus):
+    sim, io = bus
+    calls = []
+
+    def unplugged():
+        calls.append(1)
+        raise OSError(5, "Input/output error")
+
+    io.port.reset_input_buffer = unplugged
+    frames = [cnet.build_read_frame(0, [address], True) for address in VALUES] * 3
+    futures = [io.submit(frame, PRIORITY_POLL) for frame in frames]
+    for future in futures:
+        with pytest.raises(OSError):
+            future.result(timeout=2)
+    assert len(calls) == 1                   # buzilgan port boshqa ishlatilmaydi
+    with pytest.raises(OSError):
+        io.submit(frames[0], PRIORITY_POLL).result(timeout=2)
+    assert len(calls) == 1
+
+
+def test_retries_recover_corrupt_and_truncated_replies():
+    sim = PlcSimulator(stations=[0], corrupt_rate=0.1, truncate_rate=0.05, seed=7)
+    sim.memory.set("%MW200", 0x1111)
+    io = IOWorker(open_transport(sim.start_pty(), 115200, timeout=cnet.READ_SLICE), name="test-io")
+    try:
+        good = 0
+        for _ in range(300):
+            frame = cnet.build_read_frame(0, ["%MW200"], True)
+            reply = io.submit(frame, PRIORITY_POLL).result()
+            assert reply.retries <= MAX_RETRIES
+            decoded = cnet.decode_response(reply.request, reply.frame, reply.complete)
+            if decoded.status == "ACK":
+                good += 1
+                assert int(decoded.blocks[0], 16) == 0x1111
+        stats = io.station_stats()[0]
+        assert stats["corrupt"] and stats["truncated"] and stats["retries"]
+        assert good >= 295                   # 15% buzilish ~0.3% ga tushadi
+    finally:
+        io.close()
+        sim.stop()
@@ -0,0 +1,47 @@
+# ------------------------------------------------------------
+# O'qish rejasi simulyatorga qarshi: turlari aralash teglar
+# (X/B/W/D) alohida rSS kadrlarga bo'linishi va har bir kadr
+# NAK siz javob olishi, javob uzunligi response_size ga mos.
+#   python -m pytest -q tests
+# ------------------------------------------------------------
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+import xgt_cnet as cnet
+from xgt_sim import PlcSimulator
+
+MIXED = [
+    ["%MW200", "%MD100"],
+    ["%MW200", "%MX1"],
+    ["%MW200", "%MX5", "%MB7", "%MD100", "%MW300", "%MW301", "%MW302"],
+]
+
+
+@pytest.mark.parametrize("tags", MIXED)
+@pytest.mark.parametrize("use_bcc", [True, False])
+def test_mixed_types_read_without_nak(tags, use_bcc):
+    sim = PlcSimulator(stations=[0])
+    plan = cnet.plan_tag_reads(tags)
+    assert sorted(a for req in plan for a in req.addresses) == sorted(tags)
+    for req in plan:
+        if req.kind == "RSS":
+            assert len({cnet.address_type(a) for a in req.addresses}) == 1
+        frame = req.build_frame(req.station, use_bcc)
+        response = sim.handle(frame)
+        decoded = cnet.decode_response(frame, response, True)
+        assert decoded.status == "ACK", (str(req), decoded.error)
+        assert len(response) == req.response_size(use_bcc)
+
+
+def test_monitor_registration_with_mixed_types():
+    sim = PlcSimulator(stations=[0])
+    bound = cnet.MonitorTable().bind(cnet.plan_tag_reads(["%MW200", "%MX5"]))
+    for req in bound:
+        register = req.register_frame(0, True)
+        assert cnet.decode_response(register, sim.handle(register), True).status == "ACK"
+        execute = req.build_frame(0, True)
+        assert cnet.decode_response(execute, sim.handle(execute), True).status == "ACK"
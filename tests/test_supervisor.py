@@ -0,0 +1,83 @@
+# ------------------------------------------------------------
+# PortSupervisor simulyatorga qarshi (pty): qurilma yo'qolib qaytganda
+# qayta ulanish, adapter sug'urilganda pyserial dan chiqadigan
+# termios.error port yo'qolishi sifatida ushlanishi.
+#   python -m pytest -q tests
+# ------------------------------------------------------------
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+termios = pytest.importorskip("termios")
+
+import xgt_cnet as cnet
+from xgt_link import PRIORITY_POLL
+from xgt_sim import PlcSimulator
+from xgt_supervisor import PortSupervisor
+
+FRAME = cnet.build_read_frame(0, ["%MW200"], True)
+
+
+def unplugged(*args):
+    raise termios.error(5, "Input/output error")
+
+
+@pytest.fixture
+def sim():
+    sim = PlcSimulator(stations=[0])
+    yield sim
+    sim.stop()
+
+
+def test_reconnects_when_device_returns(sim, tmp_path):
+    node = tmp_path / "ttyUSB0"                          # USB adapterning /dev tuguni o'rnida
+    target = sim.start_pty()
+    node.symlink_to(target)
+    connected = []
+    sup = PortSupervisor(str(node), 115200, on_connect=connected.append)
+    try:
+        assert sup.connect()
+        io = sup.io
+        node.unlink()                                    # adapter sug'urildi
+        sup.lost(io, OSError(5, "Input/output error"))
+        time.sleep(0.3)
+        assert sup.io is None and sup.reconnecting and len(connected) == 1
+        node.symlink_to(target)                          # qaytib qo'yildi
+        deadline = time.monotonic() + 2
+        while len(connected) < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert len(connected) == 2 and sup.io is connected[1]
+        stats = sup.stats()
+        assert stats["outages"] == 1 and stats["last_outage_s"] >= 0.3
+        reply = sup.io.transact(FRAME)
+        assert cnet.decode_response(FRAME, reply.frame, reply.complete).status == "ACK"
+    finally:
+        sup.close()
+
+
+def test_termios_error_is_port_loss_and_reconnects(sim):
+    lost, connected = [], threading.Event()
+    sup = PortSupervisor(sim.start_pty(), 115200, on_lost=lost.append,
+                         on_connect=lambda io: connected.set())
+    try:
+        io = sup.open()
+        assert cnet.decode_response(FRAME, io.transact(FRAME).frame, True).status == "ACK"
+
+        io.port.serial.reset_input_buffer = unplugged      # tcflush -> EIO
+        future = io.submit(FRAME, PRIORITY_POLL)
+        with pytest.raises(OSError) as error:              # islom.send_to_plc / xgt_daemon shunday ushlaydi
+            future.result(timeout=2)
+        sup.lost(io, error.value)
+
+        assert len(lost) == 1 and "Input/output error" in str(lost[0])
+        assert connected.wait(2), "supervisor did not reopen the port"
+        assert sup.io is not io
+        reply = sup.io.transact(FRAME)
+        assert cnet.decode_response(FRAME, reply.frame, reply.complete).status == "ACK"
+    finally:
+        sup.close()
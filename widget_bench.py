@@ -0,0 +1,122 @@
+# ------------------------------------------------------------
+# Vidjetlar benchmarki (ekran kerak): ko'p sonli LED ni almashtirish
+# narxi - eski usul (delete("all") + qayta chizish) va hozirgi usul
+# (oldindan chizilgan holatlar, faqat ko'rinish o'zgaradi).
+#
+#   python widget_bench.py --leds 300 --rounds 20 --output widgets.json
+# ------------------------------------------------------------
+import argparse
+import json
+import platform
+import sys
+import time
+import tkinter as tk
+
+import customtkinter as ctk
+
+from islom import ModernLED
+
+
+class RedrawLED(ModernLED):
+    """Avvalgi ModernLED: har almashtirishda kanvas tozalanib, 13+ element qayta yaratiladi"""
+
+    def build(self):
+        self.draw_off()
+
+    def draw_off(self):
+        self.canvas.delete("all")
+        cx = cy = self.size // 2
+        self.canvas.create_oval(cx-5, cy-5, cx+self.size//2+5, cy+self.size//2+5, fill="#1a1a1a", outline="")
+        self.canvas.create_oval(cx-self.size//2+5, cy-self.size//2+5, cx+self.size//2-5, cy+self.size//2-5, fill="#3a3a3a", outline="#888", width=2)
+        self.canvas.create_oval(cx-12, cy-12, cx+12, cy+12, fill="#555", outline="#666", width=1)
+        self.canvas.create_text(cx, cy+30, text=self.text, fill="white", font=("Arial", 10, "bold"))
+
+    def draw_on(self):
+        self.canvas.delete("all")
+        cx = cy = self.size // 2
+        self.canvas.create_oval(cx-5, cy-5, cx+self.size//2+5, cy+self.size//2+5, fill="#1a1a1a", outline="")
+        self.canvas.create_oval(cx-self.size//2+5, cy-self.size//2+5, cx+self.size//2-5, cy+self.size//2-5, fill="#3a3a3a", outline="#888", width=2)
+        for i in range(10, 0, -1):
+            alpha = int(255 * (0.3 + 0.7 * (i/10)))
+            color = f"#{alpha:02x}ff{alpha:02x}"
+            self.canvas.create_oval(cx-i+5, cy-i+5, cx+i-5, cy+i-5, fill=color, outline="")
+        self.canvas.create_text(cx, cy+30, text=self.text, fill="white", font=("Arial", 10, "bold"))
+
+    def set_state(self, on):
+        if on != self.state:
+            self.state = on
+            if on: self.draw_on()
+            else: self.draw_off()
+
+
+def bench_leds(root, cls, count, rounds, columns=30):
+    frame = ctk.CTkFrame(root)
+    frame.pack(fill="both", expand=True)
+    leds = [cls(frame, text=f"L{i}", size=40) for i in range(count)]
+    for i, led in enumerate(leds):
+        led.grid(row=i // columns, column=i % columns)
+    root.update()
+
+    toggle_s = []      # faqat set_state (Python + Tcl buyruqlari)
+    frame_s = []       # set_state + ekranga chiqarish (update_idletasks)
+    for n in range(rounds):
+        state = n % 2 == 0
+        started = time.perf_counter()
+        for led in leds:
+            led.set_state(state)
+        toggled = time.perf_counter()
+        root.update_idletasks()
+        done = time.perf_counter()
+        toggle_s.append(toggled - started)
+        frame_s.append(done - started)
+    items = len(leds[0].canvas.find_all())
+    frame.destroy()
+    root.update()
+    per = lambda values: round(sorted(values)[len(values) // 2] / count * 1e6, 2)
+    return {
+        "leds": count,
+        "rounds": rounds,
+        "canvas_items_per_led": items,
+        "toggle_us_per_led": per(toggle_s),
+        "frame_us_per_led": per(frame_s),
+        "frame_ms_all_leds": round(sorted(frame_s)[len(frame_s) // 2] * 1000, 2),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tk widget update benchmark (needs a display)")
+    parser.add_argument("--leds", type=int, default=300)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    try:
+        root = ctk.CTk()
+    except tk.TclError as e:
+        sys.exit(f"widget_bench needs a display: {e}")
+    root.geometry("1400x900")
+
+    results = {
+        "meta": {
+            "python": platform.python_version(),
+            "tk": tk.TkVersion,
+            "platform": platform.platform(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "led_toggle": {
+            "before_redraw": bench_leds(root, RedrawLED, args.leds, args.rounds),
+            "after_prerendered": bench_leds(root, ModernLED, args.leds, args.rounds),
+        },
+    }
+    root.destroy()
+
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
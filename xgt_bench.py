@@ -0,0 +1,270 @@
+# ------------------------------------------------------------
+# Cnet yo'lining benchmarki: send_to_plc ishlatadigan IOWorker orqali
+# standart yuklamalar simulyator (pty/TCP) yoki haqiqiy portga qarshi.
+#
+#   python xgt_bench.py --baud 115200 --output bench.json
+#   python xgt_bench.py --port COM10 --baud 9600 --workloads single_read
+#
+# Natija JSON: o'tkazuvchanlik, RTT p50/p95/p99, teg boshiga simdagi
+# baytlar va tranzaksiya boshiga CPU (faqat shu jarayon; simulyator
+# alohida jarayonda ishlaydi). Bu modul GUI ga bog'liq emas.
+# ------------------------------------------------------------
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+
+import xgt_cnet as cnet
+from xgt_link import IOWorker, PRIORITY_POLL, PRIORITY_READ, PRIORITY_WRITE
+from xgt_transport import open_transport
+
+WORKLOADS = ("single_read", "single_write", "many_tags", "mixed")
+SIM = os.path.join(os.path.dirname(os.path.abspath(__file__)), "xgt_sim.py")
+
+
+class Samples:
+    """Bitta yuklama o'lchovlari"""
+
+    def __init__(self):
+        self.rtt = []            # s, simdagi aylanish (Reply.rtt)
+        self.latency = []        # s, navbatga qo'yishdan natijagacha (faqat mixed, UI so'rovlari)
+        self.tx_bytes = 0
+        self.rx_bytes = 0
+        self.tags = 0
+        self.errors = 0
+        self.lock = threading.Lock()
+
+    def add(self, reply, tags):
+        with self.lock:
+            self.rtt.append(reply.rtt)
+            self.tx_bytes += len(reply.request)
+            self.rx_bytes += len(reply.frame)
+            if reply.complete and reply.frame[:1] == b"\x06":
+                self.tags += tags
+            else:
+                self.errors += 1
+
+    def report(self, elapsed, cpu):
+        count = len(self.rtt)
+        result = {
+            "transactions": count,
+            "tags": self.tags,
+            "errors": self.errors,
+            "duration_s": round(elapsed, 3),
+            "tx_per_s": round(count / elapsed, 1) if elapsed else 0.0,
+            "tags_per_s": round(self.tags / elapsed, 1) if elapsed else 0.0,
+            "rtt_ms": percentiles(self.rtt),
+            "tx_bytes": self.tx_bytes,
+            "rx_bytes": self.rx_bytes,
+            "bytes_per_tag": round((self.tx_bytes + self.rx_bytes) / self.tags, 1) if self.tags else None,
+            "cpu_us_per_tx": round(cpu / count * 1e6, 1) if count else None,
+        }
+        if self.latency:
+            result["ui_latency_ms"] = percentiles(self.latency)
+        return result
+
+
+def percentiles(values):
+    if not values:
+        return None
+    ordered = sorted(values)
+
+    def pick(p):
+        return round(ordered[min(len(ordered) - 1, int(p * len(ordered)))] * 1000, 3)
+
+    return {"p50": pick(0.50), "p95": pick(0.95), "p99": pick(0.99), "max": round(ordered[-1] * 1000, 3)}
+
+
+def tag_list(count, start=200, stride=3):
+    """Dashboard ga o'xshash tarqoq word manzillar"""
+    return [f"%MW{start + i * stride}" for i in range(count)]
+
+
+def build_plan(io, args):
+    """many_tags rejasi; --monitor bo'lsa X bilan ro'yxatga olinib, Y kadrlari qaytadi"""
+    plan = cnet.plan_tag_reads(tag_list(args.tags), default_station=args.station, gap=args.gap)
+    if not args.monitor:
+        return [(req.build_frame(req.station, args.bcc), len(req.addresses)) for req in plan]
+    bound = cnet.MonitorTable().bind(plan)
+    frames = []
+    for req in bound:
+        if req.kind == "MON":
+            io.transact(req.register_frame(req.station, args.bcc), PRIORITY_READ)
+        frames.append((req.build_frame(req.station, args.bcc), len(req.addresses)))
+    return frames
+
+
+def run_for(duration, step):
+    """step() ni duration soniya davomida takrorlash; (o'tgan vaqt, CPU) qaytaradi"""
+    cpu = time.process_time()
+    started = time.perf_counter()
+    deadline = started + duration
+    while time.perf_counter() < deadline:
+        step()
+    return time.perf_counter() - started, time.process_time() - cpu
+
+
+def single_read(io, args):
+    samples = Samples()
+    frame = cnet.build_read_frame(args.station, [args.read_addr], args.bcc)
+    elapsed, cpu = run_for(args.duration, lambda: samples.add(io.transact(frame, PRIORITY_READ), 1))
+    return samples.report(elapsed, cpu)
+
+
+def single_write(io, args):
+    samples = Samples()
+    counter = [0]
+
+    def step():
+        counter[0] = (counter[0] + 1) & 0xFFFF
+        frame = cnet.build_write_frame(args.station, args.write_addr, f"{counter[0]:04X}", args.bcc)
+        samples.add(io.transact(frame, PRIORITY_WRITE), 1)
+
+    elapsed, cpu = run_for(args.duration, step)
+    return samples.report(elapsed, cpu)
+
+
+def refresh(io, frames, samples, priority):
+    """Rejadagi hamma kadrni navbatga qo'yib, tugashini kutish (UI dagi read_many kabi)"""
+    futures = [(io.submit(frame, priority), tags) for frame, tags in frames]
+    for future, tags in futures:
+        reply = future.result()
+        if not reply.skipped:
+            samples.add(reply, tags)
+
+
+def many_tags(io, args):
+    samples = Samples()
+    frames = build_plan(io, args)
+    elapsed, cpu = run_for(args.duration, lambda: refresh(io, frames, samples, PRIORITY_READ))
+    result = samples.report(elapsed, cpu)
+    result["frames_per_refresh"] = len(frames)
+    result["refresh_per_s"] = round(len(samples.rtt) / len(frames) / elapsed, 1) if elapsed else 0.0
+    return result
+
+
+def mixed(io, args):
+    """Fon so'rovi to'xtovsiz many_tags ni o'qiydi; UI har ui_interval da o'qish/yozish qiladi"""
+    samples = Samples()
+    frames = build_plan(io, args)
+    stop = threading.Event()
+
+    def poll():
+        while not stop.is_set():
+            refresh(io, frames, samples, PRIORITY_POLL)
+
+    poller = threading.Thread(target=poll, name="bench-poll", daemon=True)
+    read_frame = cnet.build_read_frame(args.station, [args.read_addr], args.bcc)
+    counter = [0]
+
+    def step():
+        counter[0] += 1
+        if counter[0] % 2:
+            frame, priority = read_frame, PRIORITY_READ
+        else:
+            frame = cnet.build_write_frame(args.station, args.write_addr, f"{counter[0] & 0xFFFF:04X}", args.bcc)
+            priority = PRIORITY_WRITE
+        submitted = time.perf_counter()
+        reply = io.submit(frame, priority).result()
+        samples.latency.append(time.perf_counter() - submitted)
+        samples.add(reply, 1)
+        time.sleep(args.ui_interval)
+
+    poller.start()
+    try:
+        elapsed, cpu = run_for(args.duration, step)
+    finally:
+        stop.set()
+        poller.join()
+    return samples.report(elapsed, cpu)
+
+
+def start_simulator(args):
+    """Simulyatorni alohida jarayonda ishga tushirish; (jarayon, port nomi)"""
+    cmd = [sys.executable, SIM, "--stations", str(args.station), "--scan-ms", str(args.scan_ms)]
+    if args.baud_timing:
+        cmd += ["--baud", str(args.baud)]
+    if args.transport == "tcp":
+        cmd += ["--tcp", "0"]
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    line = proc.stdout.readline().strip()
+    if not line:
+        proc.kill()
+        raise RuntimeError("simulator did not start")
+    return proc, line.split(" ", 1)[1]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="XGT Cnet link benchmark")
+    parser.add_argument("--port", help="benchmark an existing port / tcp:// address instead of the simulator")
+    parser.add_argument("--transport", choices=["pty", "tcp"], default="pty", help="simulator transport")
+    parser.add_argument("--baud", type=int, default=115200)
+    parser.add_argument("--no-baud-timing", dest="baud_timing", action="store_false",
+                        help="simulator answers at full speed instead of emulating wire time")
+    parser.add_argument("--scan-ms", type=float, default=0.0, help="simulator PLC scan delay")
+    parser.add_argument("--station", type=int, default=0)
+    parser.add_argument("--no-bcc", dest="bcc", action="store_false")
+    parser.add_argument("--fixed-timeout", action="store_true",
+                        help="use the fixed RESPONSE_TIMEOUT instead of baud/RTT based timeouts")
+    parser.add_argument("--monitor", action="store_true", help="many_tags/mixed use monitor X/Y frames")
+    parser.add_argument("--tags", type=int, default=64, help="tags per refresh in many_tags/mixed")
+    parser.add_argument("--gap", type=int, default=4, help="rSB gap (see plan_reads)")
+    parser.add_argument("--read-addr", default="%MW200")
+    parser.add_argument("--write-addr", default="%MW300")
+    parser.add_argument("--duration", type=float, default=3.0, help="seconds per workload")
+    parser.add_argument("--ui-interval", type=float, default=0.02, help="mixed: pause between UI requests (s)")
+    parser.add_argument("--workloads", default=",".join(WORKLOADS))
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    proc = None
+    port_name = args.port
+    if port_name is None:
+        proc, port_name = start_simulator(args)
+    io = IOWorker(open_transport(port_name, args.baud, timeout=cnet.READ_SLICE), name="bench-io", adaptive=not args.fixed_timeout)
+    results = {
+        "meta": {
+            "port": port_name if args.port else f"simulator/{args.transport}",
+            "baud": args.baud,
+            "baud_timing": args.baud_timing if not args.port else None,
+            "scan_ms": args.scan_ms if not args.port else None,
+            "bcc": args.bcc,
+            "adaptive_timeout": not args.fixed_timeout,
+            "monitor": args.monitor,
+            "tags": args.tags,
+            "duration_s": args.duration,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "workloads": {},
+    }
+    runners = {name: globals()[name] for name in WORKLOADS}
+    try:
+        for name in args.workloads.split(","):
+            name = name.strip()
+            if name not in runners:
+                parser.error(f"unknown workload {name!r}; choose from {', '.join(WORKLOADS)}")
+            results["workloads"][name] = runners[name](io, args)
+            print(f"# {name}: {results['workloads'][name]['tx_per_s']} tx/s", file=sys.stderr)
+        results["stations"] = io.station_stats()
+    finally:
+        io.close()
+        if proc is not None:
+            proc.terminate()
+            proc.wait()
+
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+# ------------------------------------------------------------
+# Trafikni ikkilik faylga yozish (capture) va mmap orqali o'qish /
+# oflayn qayta tahlil qilish (replay). Bu modul GUI ga bog'liq emas.
+#
+# Fayl formati:
+#   sarlavha: MAGIC(8) + wall_ns(8) + mono_ns(8)   - ochilgan paytdagi soatlar
+#   yozuv:    mono_ns(8) + yo'nalish(1) + uzunlik(2) + kadr baytlari
+# Hammasi little-endian. mono_ns - time.monotonic_ns(), wall_ns esa
+# uni haqiqiy vaqtga o'girish uchun.
+# ------------------------------------------------------------
+import argparse
+import glob
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+from bisect import bisect_left
+
+import xgt_cnet as cnet
+
+MAGIC = b"XGTCAP01"
+HEADER = struct.Struct("<8sQQ")
+RECORD = struct.Struct("<QBH")
+
+TX = 0
+RX = 1
+DIRECTIONS = {TX: "TX", RX: "RX"}
+
+MAX_FILE_BYTES = 64 * 1024 * 1024
+MAX_FILES = 16           # shundan eskilari o'chiriladi
+SUFFIX = ".xcap"
+
+
+class CaptureWriter:
+    """
+    Doimiy yozuvchi: har bir TX/RX kadr monotonik nanosekund vaqti bilan.
+    Fayl max_bytes dan oshsa yangisi ochiladi, eng eskilari o'chiriladi.
+    """
+
+    def __init__(self, directory, prefix="xgt", max_bytes=MAX_FILE_BYTES, max_files=MAX_FILES):
+        self.directory = directory
+        self.prefix = prefix
+        self.max_bytes = max_bytes
+        self.max_files = max_files
+        self.lock = threading.Lock()
+        self.file = None
+        self.size = 0
+        self.records = 0
+        self.pending = False             # flush() dan keyin yozilgan narsa bormi
+        os.makedirs(directory, exist_ok=True)
+        existing = self.files()
+        self.seq = _seq_of(existing[-1]) + 1 if existing else 0
+        self._open()
+
+    def files(self):
+        return sorted(glob.glob(os.path.join(self.directory, f"{self.prefix}.*{SUFFIX}")), key=_seq_of)
+
+    @property
+    def path(self):
+        return os.path.join(self.directory, f"{self.prefix}.{self.seq:05d}{SUFFIX}")
+
+    def write(self, direction, frame, t_ns=None):
+        if t_ns is None:
+            t_ns = time.monotonic_ns()
+        frame = bytes(frame[:0xFFFF])
+        with self.lock:
+            if self.file is None:
+                return
+            if self.size + RECORD.size + len(frame) > self.max_bytes:
+                self._rotate()
+            self.file.write(RECORD.pack(t_ns, direction, len(frame)))
+            self.file.write(frame)
+            self.size += RECORD.size + len(frame)
+            self.records += 1
+            self.pending = True
+
+    def flush(self):
+        """Buferni faylga (davriy chaqiriladi; yangi yozuv bo'lmasa hech narsa qilmaydi)"""
+        with self.lock:
+            if self.file is not None and self.pending:
+                self.file.flush()
+                self.pending = False
+
+    def close(self):
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+    def _open(self):
+        self.file = open(self.path, "wb", buffering=256 * 1024)
+        self.file.write(HEADER.pack(MAGIC, time.time_ns(), time.monotonic_ns()))
+        self.size = HEADER.size
+
+    def _rotate(self):
+        self.file.close()
+        self.seq += 1
+        self._open()
+        for old in self.files()[:-self.max_files]:
+            try:
+                os.remove(old)
+            except OSError:
+                pass
+
+
+def _seq_of(path):
+    try:
+        return int(os.path.basename(path).rsplit(".", 2)[-2])
+    except (ValueError, IndexError):
+        return -1
+
+
+class CaptureReader:
+    """
+    Capture faylini mmap orqali o'qish. Yozuvlar indeksi (ofsetlar va vaqtlar)
+    bir marta quriladi; keyin vaqt bo'yicha qidirish ikkilik qidiruv bilan.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._fh = open(path, "rb")
+        size = os.fstat(self._fh.fileno()).st_size
+        if size < HEADER.size:
+            raise ValueError(f"{path}: not a capture file")
+        self.mm = mmap.mmap(self._fh.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.wall_ns, self.mono_ns = HEADER.unpack_from(self.mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path}: bad capture header")
+        self._offsets = None
+        self._times = None
+
+    def close(self):
+        self.mm.close()
+        self._fh.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _build_index(self):
+        offsets, times = [], []
+        mm, pos, end = self.mm, HEADER.size, len(self.mm)
+        while pos + RECORD.size <= end:
+            t_ns, _, length = RECORD.unpack_from(mm, pos)
+            if pos + RECORD.size + length > end:
+                break                      # oxirgi yozuv to'liq yozilmagan
+            offsets.append(pos)
+            times.append(t_ns)
+            pos += RECORD.size + length
+        self._offsets, self._times = offsets, times
+
+    @property
+    def offsets(self):
+        if self._offsets is None:
+            self._build_index()
+        return self._offsets
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __getitem__(self, index):
+        """(mono_ns, yo'nalish, kadr)"""
+        pos = self.offsets[index]
+        t_ns, direction, length = RECORD.unpack_from(self.mm, pos)
+        start = pos + RECORD.size
+        return t_ns, direction, self.mm[start:start + length]
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def wall_time(self, t_ns):
+        """Monotonik vaqtni haqiqiy (epoch) soniyaga o'girish"""
+        return (self.wall_ns + (t_ns - self.mono_ns)) / 1e9
+
+    def index_at(self, t_ns):
+        """t_ns dan keyingi birinchi yozuv indeksi"""
+        self.offsets
+        return bisect_left(self._times, t_ns)
+
+    def select(self, start_ns=None, end_ns=None, direction=None, station=None, contains=None):
+        """Vaqt oralig'i, yo'nalish, stansiya va matn bo'yicha filtr"""
+        first = self.index_at(start_ns) if start_ns is not None else 0
+        station_bytes = f"{station:02d}".encode("ascii") if station is not None else None
+        for i in range(first, len(self)):
+            t_ns, d, frame = self[i]
+            if end_ns is not None and t_ns > end_ns:
+                break
+            if direction is not None and d != direction:
+                continue
+            if station_bytes is not None and frame[1:3] != station_bytes:
+                continue
+            if contains is not None and contains not in frame:
+                continue
+            yield t_ns, d, frame
+
+
+def replay(records):
+    """
+    TX/RX yozuvlarini juftlab, javob tahlilchisidan o'tkazish (real vaqtdan ancha tez).
+    Har bir so'rov uchun: (tx_ns, rtt_ns, so'rov, javob, Decoded)
+    """
+    pending = None
+    for t_ns, direction, frame in records:
+        frame = bytes(frame)
+        if direction == TX:
+            if pending is not None:          # javobsiz qolgan so'rov
+                yield pending[0], None, pending[1], b"", cnet.decode_response(pending[1], b"")
+            pending = (t_ns, frame)
+        elif pending is not None:
+            tx_ns, request = pending
+            pending = None
+            # Javob dekoderdan o'tadi: to'liq kadr chiqsa, BCC ham joyida
+            complete = bool(cnet.FrameDecoder(cnet.frame_uses_bcc(request)).feed(frame))
+            yield tx_ns, t_ns - tx_ns, request, frame, cnet.decode_response(request, frame, complete)
+    if pending is not None:
+        yield pending[0], None, pending[1], b"", cnet.decode_response(pending[1], b"")
+
+
+# ------------------------------------------------------------
+# Buyruq qatori: python xgt_capture.py dump|replay fayl...
+# ------------------------------------------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="XGT Cnet capture file tool")
+    parser.add_argument("command", choices=["dump", "replay", "stats"])
+    parser.add_argument("files", nargs="+")
+    parser.add_argument("--station", type=int)
+    parser.add_argument("--contains", help="only frames containing this ASCII text, e.g. %%MW200")
+    parser.add_argument("--status", help="replay: only ACK/NAK/TIMEOUT/BAD")
+    args = parser.parse_args(argv)
+    contains = args.contains.encode("ascii") if args.contains else None
+
+    started = time.perf_counter()
+    count = 0
+    totals = {}
+    for path in args.files:
+        with CaptureReader(path) as reader:
+            records = reader.select(station=args.station, contains=contains if args.command == "dump" else None)
+            if args.command == "dump":
+                for t_ns, d, frame in records:
+                    count += 1
+                    print(f"{reader.wall_time(t_ns):.6f} {DIRECTIONS.get(d, d)} {cnet.bytes_to_display(frame)}")
+                continue
+            for tx_ns, rtt_ns, request, response, decoded in replay(records):
+                if contains is not None and contains not in request:
+                    continue
+                if args.status and decoded.status != args.status.upper():
+                    continue
+                count += 1
+                totals[decoded.status] = totals.get(decoded.status, 0) + 1
+                if args.command == "replay":
+                    rtt = f"{rtt_ns / 1e6:.2f}ms" if rtt_ns is not None else "-"
+                    detail = ",".join(decoded.blocks) if decoded.status == "ACK" else (decoded.error or "")
+                    print(f"{reader.wall_time(tx_ns):.6f} ST{decoded.station} {decoded.cmd} "
+                          f"{decoded.status} {rtt} {cnet.bytes_to_display(request)} {detail}")
+
+    elapsed = time.perf_counter() - started
+    summary = " ".join(f"{k}={v}" for k, v in sorted(totals.items()))
+    print(f"# {count} records in {elapsed:.3f}s {summary}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,721 @@
+# ------------------------------------------------------------
+# LS XGT Cnet protokoli: kadr yaratish va javobni tahlil qilish
+# (7.2 bo'lim). Bu modul GUI ga bog'liq emas.
+# ------------------------------------------------------------
+
+import re
+import time
+from collections import namedtuple
+
+ENQ = 0x05
+EOT = 0x04
+ACK = 0x06
+NAK = 0x15
+ETX = 0x03
+
+MAX_BLOCKS = 16          # bitta rSS/wSS kadrida eng ko'p blok (xato kodi 0003)
+MAX_BLOCK_WORDS = 60     # bitta rSB kadrida eng ko'p word (xato kodi 1232)
+MAX_MONITORS = 32        # monitor ro'yxatga olish raqamlari 00..1F (xato kodi 0290)
+RESPONSE_TIMEOUT = 1.5   # javob uchun umumiy kutish vaqti (s)
+READ_SLICE = 0.01        # portning o'z timeout i (s): o'zgarmaydi, muddatlar siklda tekshiriladi
+
+_WORD_ADDR = re.compile(r"^%([A-Z])W(\d+)$")
+
+# Xatolik kodlari (7.2.8 bo'lim)
+ERROR_CODES = {
+    "0003": "Block count exceeds 16", "0004": "Variable length > 12",
+    "0007": "Invalid data type", "0011": "Data error / invalid variable",
+    "0090": "Monitor not registered", "0190": "Monitor number out of range",
+    "0290": "Monitor registration number out of range", "1132": "Invalid device memory",
+    "1232": "Data size > max (60 words)", "1234": "Extra frame data",
+    "1332": "Data type mismatch in blocks", "1432": "Invalid hex data",
+    "7132": "Variable area exceeded"
+}
+
+# status: ACK / NAK / TIMEOUT / BAD, blocks: o'qilgan data hex lar, error: NAK kodi yoki izoh
+Decoded = namedtuple("Decoded", "status station cmd blocks error")
+
+
+def calculate_bcc(frame_bytes):
+    """ENQ dan EOT gacha bo'lgan baytlarning yig'indisining pastki 8 biti (7.2.3)"""
+    total = sum(frame_bytes) & 0xFF
+    return f"{total:02X}"
+
+
+def parse_station(text):
+    """Stansiya raqami 0..31, noto'g'ri bo'lsa 0"""
+    try:
+        station = int(text)
+        if station < 0 or station > 31:
+            station = 0
+    except (TypeError, ValueError):
+        station = 0
+    return station
+
+
+def _finish(frame, use_bcc):
+    frame = frame.encode('ascii')
+    if use_bcc:
+        frame += calculate_bcc(frame).encode('ascii')
+    return frame
+
+
+def _rss_body(addresses):
+    if not 1 <= len(addresses) <= MAX_BLOCKS:
+        raise ValueError(f"RSS block count must be 1..{MAX_BLOCKS}, got {len(addresses)}")
+    blocks = "".join(f"{len(addr):02X}{addr}" for addr in addresses)
+    return f"SS{len(addresses):02X}{blocks}"
+
+
+def _rsb_body(address, count):
+    if not 1 <= count <= MAX_BLOCK_WORDS:
+        raise ValueError(f"RSB word count must be 1..{MAX_BLOCK_WORDS}, got {count}")
+    return f"SB{len(address):02X}{address}{count:02X}"
+
+
+def build_read_frame(station, addresses, use_bcc=True):
+    """
+    Individual o'qish (rSS): 1..16 ta o'zgaruvchi bitta kadrda.
+    addresses: ['%MW200', '%MW210', ...]
+    """
+    cmd_letter = "r" if use_bcc else "R"
+    return _finish(f"\x05{station:02d}{cmd_letter}{_rss_body(addresses)}\x04", use_bcc)
+
+
+def build_write_frame(station, address, data_hex, use_bcc=True):
+    """Individual yozish (wSS), bitta blok"""
+    cmd_letter = "w" if use_bcc else "W"
+    return _finish(f"\x05{station:02d}{cmd_letter}SS01{len(address):02X}{address}{data_hex}\x04", use_bcc)
+
+
+def build_block_read_frame(station, address, count, use_bcc=True):
+    """Uzluksiz o'qish (rSB): address dan boshlab count ta word"""
+    cmd_letter = "r" if use_bcc else "R"
+    return _finish(f"\x05{station:02d}{cmd_letter}{_rsb_body(address, count)}\x04", use_bcc)
+
+
+def build_monitor_register_frame(station, slot, read_body, use_bcc=True):
+    """Monitor ro'yxatga olish (xNN + RSS/RSB so'rovi), 7.2.6"""
+    if not 0 <= slot < MAX_MONITORS:
+        raise ValueError(f"Monitor slot must be 0..{MAX_MONITORS - 1}, got {slot}")
+    cmd_letter = "x" if use_bcc else "X"
+    return _finish(f"\x05{station:02d}{cmd_letter}{slot:02X}R{read_body}\x04", use_bcc)
+
+
+def build_monitor_exec_frame(station, slot, use_bcc=True):
+    """Ro'yxatdagi monitorni bajarish (yNN) - eng qisqa so'rov"""
+    if not 0 <= slot < MAX_MONITORS:
+        raise ValueError(f"Monitor slot must be 0..{MAX_MONITORS - 1}, got {slot}")
+    cmd_letter = "y" if use_bcc else "Y"
+    return _finish(f"\x05{station:02d}{cmd_letter}{slot:02X}\x04", use_bcc)
+
+
+def get_error_description(error_code):
+    return ERROR_CODES.get(error_code, "Unknown error")
+
+
+def bytes_to_display(data):
+    result = []
+    for b in data:
+        if b == 0x05: result.append('[ENQ]')
+        elif b == 0x06: result.append('[ACK]')
+        elif b == 0x15: result.append('[NAK]')
+        elif b == 0x04: result.append('[EOT]')
+        elif b == 0x03: result.append('[ETX]')
+        elif 32 <= b <= 126: result.append(chr(b))
+        else: result.append(f'[{b:02X}]')
+    return ''.join(result)
+
+
+def frame_uses_bcc(frame):
+    """Kichik harfli komanda = BCC bor (7.2.3)"""
+    return frame[3:4].islower()
+
+
+def reply_matches(request, response):
+    """Javob shu so'rovnikimi: stansiya va buyruq harfi (javobda takrorlanadi) bir xil"""
+    return bytes(response[1:3]) == bytes(request[1:3]) and bytes(response[3:4]).lower() == bytes(request[3:4]).lower()
+
+
+def frame_error(request, response, complete=True):
+    """
+    Qabul qilingan kadrni tekshirish: None - yaroqli, aks holda sabab.
+    BCC li so'rovda javobning BCC si ham qayta hisoblanib solishtiriladi.
+    """
+    if not complete:
+        return "Truncated frame"
+    if frame_uses_bcc(request) and not bcc_valid(response):
+        return "BCC mismatch"
+    if not reply_matches(request, response):
+        return "Reply mismatch"
+    return None
+
+
+def bcc_valid(response):
+    """BCC li kadrning oxirgi 2 belgisi qolgan baytlar yig'indisiga mosmi"""
+    return calculate_bcc(response[:-2]).encode('ascii') == bytes(response[-2:]).upper()
+
+
+def split_read_blocks(response, has_bcc):
+    """
+    rSS ACK javobini bloklarga ajratish.
+    ACK + station(2) + cmd(1) + cmd_type(2) + blocks(2) + [data_count(2) + data]*blocks + ETX (+BCC)
+    Qaytaradi: har bir blok uchun data hex string ro'yxati.
+    """
+    etx_pos = len(response) - 3 if has_bcc else len(response) - 1
+    try:
+        block_count = int(response[6:8], 16)
+    except ValueError:
+        raise ValueError("Invalid block count")
+
+    values = []
+    pos = 8
+    for _ in range(block_count):
+        try:
+            data_bytes = int(response[pos:pos + 2], 16)   # necha byte data (word*2)
+        except ValueError:
+            raise ValueError("Invalid data count")
+        data_start = pos + 2
+        data_end = data_start + data_bytes * 2           # har bir byte 2 ASCII belgi
+        if data_end > etx_pos:
+            raise ValueError("Data length mismatch")
+        values.append(response[data_start:data_end].decode('ascii'))
+        pos = data_end
+    return values
+
+
+def decode_response(request, response, complete=True):
+    """
+    So'rov/javob juftini GUI siz tahlil qilish (oflayn qayta ishlash va daemon uchun).
+    Qaytaradi: Decoded(status, station, cmd, blocks, error)
+    """
+    station = int(request[1:3])
+    cmd = chr(request[3]).lower()
+    if not response:
+        return Decoded("TIMEOUT", station, cmd, [], None)
+    error = frame_error(request, response, complete)
+    if error is not None:
+        return Decoded("BAD", station, cmd, [], error)
+    has_bcc = frame_uses_bcc(request)
+    if response[0] == ACK:
+        if cmd in ("r", "y"):
+            try:
+                return Decoded("ACK", station, cmd, split_read_blocks(response, has_bcc), None)
+            except ValueError as e:
+                return Decoded("BAD", station, cmd, [], str(e))
+        if len(response) >= 7 and response[6] == ETX:
+            return Decoded("ACK", station, cmd, [], None)
+        return Decoded("BAD", station, cmd, [], "Unexpected response format")
+    if response[0] == NAK:
+        etx_pos = response.find(b'\x03', 6)
+        code = response[6:etx_pos].decode('ascii', 'replace') if etx_pos > 6 else None
+        return Decoded("NAK", station, cmd, [], code)
+    return Decoded("BAD", station, cmd, [], "Unknown response (no ACK/NAK)")
+
+
+def parse_tag(tag, default_station=0):
+    """'3:%MW200' -> (3, '%MW200'); stansiyasiz teg default_station ga tegishli"""
+    tag = tag.strip()
+    if ":" in tag:
+        station, address = tag.split(":", 1)
+        return parse_station(station), address.strip()
+    return default_station, tag
+
+
+def format_tag(station, address):
+    return f"{station}:{address}"
+
+
+def chunks(items, size=MAX_BLOCKS):
+    """Ro'yxatni size tadan bo'laklarga ajratish"""
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+# ------------------------------------------------------------
+# O'qish rejasi: ketma-ket word manzillarni rSB ga birlashtirish,
+# qolganlarini 16 tadan rSS kadrlarga jamlash
+# ------------------------------------------------------------
+def parse_word_address(address):
+    """'%MW100' -> ('M', 100), word bo'lmasa None"""
+    m = _WORD_ADDR.match(address.strip().upper())
+    if not m:
+        return None
+    return m.group(1), int(m.group(2))
+
+
+def address_type(address):
+    """'%MX5' -> 'X', '%MD100' -> 'D' (rSS kadrida hamma manzil bir turda bo'lishi shart)"""
+    return address.strip()[2:3].upper()
+
+
+def _response_size(data_bytes_per_block, use_bcc):
+    # ACK + station(2) + cmd(1) + cmd_type(2) + blocks(2) + [count(2) + data]* + ETX (+BCC)
+    size = 8 + sum(2 + n * 2 for n in data_bytes_per_block) + 1
+    return size + 2 if use_bcc else size
+
+
+class MultiRead:
+    """rSS: 16 tagacha alohida manzil bitta kadrda"""
+    kind = "RSS"
+
+    def __init__(self, addresses, station=0):
+        self.addresses = list(addresses)
+        self.station = station
+        self._frames = {}                 # (stansiya, bcc) -> tayyor kadr
+
+    def __str__(self):
+        return ",".join(self.addresses)
+
+    def body(self):
+        return _rss_body(self.addresses)
+
+    def build_frame(self, station, use_bcc=True):
+        frame = self._frames.get((station, use_bcc))
+        if frame is None:
+            frame = self._frames[(station, use_bcc)] = build_read_frame(station, self.addresses, use_bcc)
+        return frame
+
+    def split_values(self, blocks):
+        return list(zip(self.addresses, blocks))
+
+    def response_size(self, use_bcc=True):
+        return _response_size([_TYPE_BYTES.get(address_type(a), 2) for a in self.addresses], use_bcc)
+
+
+class BlockRead:
+    """rSB: area dagi start dan boshlab count ta word, ichidan kerakli manzillar ajratiladi"""
+    kind = "RSB"
+
+    def __init__(self, area, start, count, members, station=0):
+        self.station = station
+        self.area = area
+        self.start = start
+        self.count = count
+        self.members = dict(members)      # manzil -> start dan siljish (word)
+        self._frames = {}
+
+    @property
+    def address(self):
+        return f"%{self.area}W{self.start}"
+
+    @property
+    def addresses(self):
+        return list(self.members)
+
+    def __str__(self):
+        return f"{self.address}..%{self.area}W{self.start + self.count - 1}"
+
+    def body(self):
+        return _rsb_body(self.address, self.count)
+
+    def build_frame(self, station, use_bcc=True):
+        frame = self._frames.get((station, use_bcc))
+        if frame is None:
+            frame = self._frames[(station, use_bcc)] = build_block_read_frame(station, self.address, self.count, use_bcc)
+        return frame
+
+    def split_values(self, blocks):
+        data = blocks[0] if blocks else ""
+        values = []
+        for addr, offset in self.members.items():
+            word = data[offset * 4:offset * 4 + 4]
+            if len(word) == 4:
+                values.append((addr, word))
+        return values
+
+    def response_size(self, use_bcc=True):
+        return _response_size([self.count * 2], use_bcc)
+
+
+def plan_tag_reads(tags, default_station=0, gap=4):
+    """Teglarni stansiya bo'yicha guruhlab rejalashtirish; har bir so'rov .station ga ega"""
+    by_station = {}
+    for tag in tags:
+        station, address = parse_tag(tag, default_station)
+        if address:
+            by_station.setdefault(station, []).append(address)
+    plan = []
+    for station in sorted(by_station):
+        for req in plan_reads(by_station[station], gap):
+            req.station = station
+            plan.append(req)
+    return plan
+
+
+def plan_reads(addresses, gap=4, max_words=MAX_BLOCK_WORDS):
+    """
+    Manzillarni eng kam kadrga rejalashtirish.
+    gap: ikki manzil orasida o'qib yuboriladigan keraksiz word lar soni
+    (qo'shimcha kadrdan ko'ra bir necha word ortiqcha o'qish arzonroq).
+    """
+    addresses = list(dict.fromkeys(a.strip() for a in addresses if a.strip()))
+    by_area = {}
+    singles = []
+    for addr in addresses:
+        parsed = parse_word_address(addr)
+        if parsed is None:
+            singles.append(addr)
+        else:
+            by_area.setdefault(parsed[0], []).append((parsed[1], addr))
+
+    plan = []
+    for area in sorted(by_area):
+        run = []
+        for index, addr in sorted(by_area[area]):
+            if run:
+                start = run[0][0]
+                if index - run[-1][0] - 1 <= gap and index - start + 1 <= max_words:
+                    run.append((index, addr))
+                    continue
+                _close_run(area, run, plan, singles)
+            run = [(index, addr)]
+        if run:
+            _close_run(area, run, plan, singles)
+
+    # Yolg'iz manzillar rSB ga emas, rSS ga jamlanadi. Turlar aralash kadrni PLC
+    # butunlay rad etadi (NAK 1332), shuning uchun X/B/W/D/L alohida kadrlarda
+    by_type = {}
+    for addr in singles:
+        by_type.setdefault(address_type(addr), []).append(addr)
+    for group in by_type.values():
+        plan.extend(MultiRead(chunk) for chunk in chunks(group))
+    return plan
+
+
+def _close_run(area, run, plan, singles):
+    if len(run) == 1:
+        singles.append(run[0][1])
+        return
+    start = run[0][0]
+    count = run[-1][0] - start + 1
+    plan.append(BlockRead(area, start, count, [(addr, index - start) for index, addr in run]))
+
+
+class MonitorRead:
+    """Monitor raqamiga bog'langan rSS/rSB so'rovi: bir marta X, keyin faqat Y"""
+    kind = "MON"
+
+    def __init__(self, slot, request):
+        self.slot = slot
+        self.request = request
+        self.station = request.station
+
+    @property
+    def addresses(self):
+        return self.request.addresses
+
+    def __str__(self):
+        return f"MON#{self.slot:02X}({self.request})"
+
+    def register_frame(self, station, use_bcc=True):
+        return build_monitor_register_frame(station, self.slot, self.request.body(), use_bcc)
+
+    def build_frame(self, station, use_bcc=True):
+        return build_monitor_exec_frame(station, self.slot, use_bcc)
+
+    def split_values(self, blocks):
+        return self.request.split_values(blocks)
+
+    def response_size(self, use_bcc=True):
+        return self.request.response_size(use_bcc)
+
+
+class MonitorTable:
+    """
+    Monitor raqamlari (00..1F) jadvali. Bir xil so'rov doim bir xil raqamni oladi;
+    joy qolmasa eng uzoq ishlatilmagan raqam bo'shatiladi. Ro'yxatga olinganlik
+    stansiya bo'yicha saqlanadi va qayta ulanishda yoki 0090 (Monitor not
+    registered) javobida bekor qilinadi.
+    """
+
+    def __init__(self, size=MAX_MONITORS):
+        self.size = size
+        self.slots = {}          # so'rov tanasi -> raqam
+        self.registered = {}     # raqam -> stansiya
+
+    def bind(self, plan):
+        """Rejadagi so'rovlarni monitor raqamlariga bog'lash; bitta rejaga joy yetmasa oddiy kadr qoladi"""
+        keys = [req.body() for req in plan]
+        bound = []
+        for key, req in zip(keys, plan):
+            slot = self.slots.pop(key, None)
+            if slot is None:
+                slot = self._free_slot(keys)
+                if slot is None:
+                    bound.append(req)
+                    continue
+            self.slots[key] = slot           # oxiriga: eng yaqinda ishlatilgan
+            bound.append(MonitorRead(slot, req))
+        return bound
+
+    def _free_slot(self, keep):
+        used = set(self.slots.values())
+        for n in range(self.size):
+            if n not in used:
+                return n
+        for key in self.slots:               # eng eski, joriy rejada bo'lmagan
+            if key not in keep:
+                slot = self.slots.pop(key)
+                self.registered.pop(slot, None)
+                return slot
+        return None
+
+    def is_registered(self, slot, station):
+        return self.registered.get(slot) == station
+
+    def mark_registered(self, slot, station):
+        self.registered[slot] = station
+
+    def invalidate(self, slot=None):
+        if slot is None:
+            self.registered.clear()
+        else:
+            self.registered.pop(slot, None)
+
+
+def describe_plan(plan):
+    """Har bir teg qaysi usulda o'qilishini ko'rsatish: {'st:manzil': 'MON#00' / 'RSS' / 'RSB'}"""
+    served = {}
+    for req in plan:
+        label = f"MON#{req.slot:02X}" if req.kind == "MON" else req.kind
+        for addr in req.addresses:
+            served[format_tag(req.station, addr)] = label
+    return served
+
+
+def plan_cost(plan, use_bcc=True):
+    """Reja narxi: kadrlar soni va simdagi baytlar (so'rov + javob)"""
+    tx = sum(len(req.build_frame(req.station, use_bcc)) for req in plan)
+    rx = sum(req.response_size(use_bcc) for req in plan)
+    tags = sum(len(req.addresses) for req in plan)
+    return {
+        "frames": len(plan),
+        "tags": tags,
+        "tx_bytes": tx,
+        "rx_bytes": rx,
+        "bytes_per_tag": round((tx + rx) / tags, 1) if tags else 0.0,
+    }
+
+
+# ------------------------------------------------------------
+# Teglar jadvali: har bir teg uchun kadr bir marta quriladi va
+# tayyor baytlar sifatida qayta yuboriladi
+# ------------------------------------------------------------
+class WriteTemplate:
+    """
+    wSS kadri qolipi. Yangi qiymatda faqat data baytlari almashtiriladi,
+    BCC esa eski va yangi data yig'indisi farqi bilan tuzatiladi.
+    """
+
+    def __init__(self, station, address, width, use_bcc=True):
+        self.width = width
+        self.use_bcc = use_bcc
+        self.buf = bytearray(build_write_frame(station, address, "0" * width, use_bcc))
+        self.end = len(self.buf) - 1 - (2 if use_bcc else 0)     # EOT joyi
+        self.start = self.end - width
+        self.total = sum(self.buf[:self.end + 1]) & 0xFF
+
+    def frame(self, data_hex):
+        data = data_hex.encode("ascii")
+        if len(data) != self.width:
+            raise ValueError(f"Write data must be {self.width} hex chars, got {len(data)}")
+        if self.use_bcc:
+            self.total = (self.total - sum(self.buf[self.start:self.end]) + sum(data)) & 0xFF
+            self.buf[-2:] = b"%02X" % self.total
+        self.buf[self.start:self.end] = data
+        return bytes(self.buf)
+
+
+class TagEntry:
+    def __init__(self, station, address, use_bcc):
+        self.station = station
+        self.address = address
+        self.use_bcc = use_bcc
+        self.read = build_read_frame(station, [address], use_bcc)
+        self.writers = {}                 # data uzunligi -> WriteTemplate
+
+    def write(self, data_hex):
+        writer = self.writers.get(len(data_hex))
+        if writer is None:
+            writer = self.writers[len(data_hex)] = WriteTemplate(self.station, self.address, len(data_hex), self.use_bcc)
+        return writer.frame(data_hex)
+
+
+class TagTable:
+    """
+    Teg matni ('%MW200' yoki '3:%MW200') -> tayyor o'qish kadri va yozish qoliplari,
+    hamda teglar to'plami -> o'qish rejasi. Jadval faqat stansiya, BCC yoki
+    manzillar o'zgarganda (configure / clear) tozalanadi.
+    """
+    MAX_ENTRIES = 1024
+
+    def __init__(self, station=0, use_bcc=True):
+        self.station = station
+        self.use_bcc = use_bcc
+        self.entries = {}
+        self.plans = {}
+        self.builds = 0                   # necha marta tozalangan
+
+    def configure(self, station, use_bcc):
+        if (station, use_bcc) != (self.station, self.use_bcc):
+            self.station, self.use_bcc = station, use_bcc
+            self.clear()
+
+    def clear(self):
+        self.entries = {}
+        self.plans = {}
+        self.builds += 1
+
+    def entry(self, tag):
+        entry = self.entries.get(tag)
+        if entry is None:
+            if len(self.entries) >= self.MAX_ENTRIES:
+                self.entries = {}
+            station, address = parse_tag(tag, self.station)
+            entry = self.entries[tag] = TagEntry(station, address, self.use_bcc)
+        return entry
+
+    def read_frame(self, tag):
+        return self.entry(tag).read
+
+    def write_frame(self, tag, data_hex):
+        return self.entry(tag).write(data_hex)
+
+    def plan(self, tags, gap=4):
+        """plan_tag_reads natijasi keshda; so'rovlar o'z kadrlarini ham eslab qoladi"""
+        key = (tuple(tags), gap)
+        plan = self.plans.get(key)
+        if plan is None:
+            if len(self.plans) >= self.MAX_ENTRIES:
+                self.plans = {}
+            plan = self.plans[key] = plan_tag_reads(tags, self.station, gap)
+        return plan
+
+
+# ------------------------------------------------------------
+# Oqimli javob dekoderi: bayt-bayt o'qish o'rniga kelgan bo'lakni
+# to'liq qabul qilib, ETX (+BCC) kelishi bilan kadrni qaytaradi
+# ------------------------------------------------------------
+class FrameDecoder:
+    """
+    Holat mashinasi: ACK/NAK boshini kutish -> ETX gacha -> BCC (2 bayt).
+    feed() istalgan uzunlikdagi bo'lakni oladi va tayyor kadrlar ro'yxatini qaytaradi.
+    """
+
+    def __init__(self, use_bcc=True):
+        self.use_bcc = use_bcc
+        self.buffer = bytearray()
+        self.discarded = 0          # kadrdan tashqaridagi (shovqin) baytlar
+
+    @property
+    def pending(self):
+        return len(self.buffer)
+
+    def feed(self, data):
+        self.buffer += data
+        frames = []
+        while self.buffer:
+            start = self._find_start()
+            if start < 0:
+                self.discarded += len(self.buffer)
+                self.buffer.clear()
+                break
+            if start:
+                self.discarded += start
+                del self.buffer[:start]
+
+            etx = self.buffer.find(b'\x03', 1)
+            if etx < 0:
+                break
+            end = etx + 3 if self.use_bcc else etx + 1
+            if len(self.buffer) < end:
+                break
+            frames.append(bytes(self.buffer[:end]))
+            del self.buffer[:end]
+        return frames
+
+    def flush(self):
+        """Tugallanmagan qismni qaytarib, buferni tozalash"""
+        partial = bytes(self.buffer)
+        self.buffer.clear()
+        return partial
+
+    def _find_start(self):
+        ack = self.buffer.find(b'\x06')
+        nak = self.buffer.find(b'\x15')
+        if ack < 0:
+            return nak
+        if nak < 0:
+            return ack
+        return min(ack, nak)
+
+
+def read_frame(port, use_bcc=True, timeout=RESPONSE_TIMEOUT, gap=None):
+    """
+    Portdan bitta javob kadrini o'qish. Birinchi bayt kelguncha read(1) kutadi,
+    keyin in_waiting dagi hamma narsa bitta chaqiruvda olinadi.
+    timeout: birinchi bayt (va gap berilmasa butun kadr) uchun muddat.
+    gap: javob boshlangandan keyin baytlar orasidagi eng uzun tanaffus.
+    Port timeout i doim READ_SLICE (faqat birinchi marta o'rnatiladi): pyserial da
+    timeout ni o'zgartirish portni qayta sozlaydi (tcsetattr / SetCommTimeouts),
+    shuning uchun muddatlar time.monotonic() bilan shu siklda tekshiriladi.
+    Qaytaradi: (kadr, to'liqmi). Vaqt tugasa tugallanmagan qism qaytadi.
+    """
+    decoder = FrameDecoder(use_bcc)
+    deadline = time.monotonic() + timeout
+    limit = deadline + RESPONSE_TIMEOUT       # to'xtovsiz shovqin oqimiga qarshi
+    _set_timeout(port, READ_SLICE)
+    last = None                               # oxirgi bayt kelgan vaqt
+    while True:
+        now = time.monotonic()
+        if last is None or gap is None:
+            if now >= deadline:
+                break
+        elif now - last >= gap or now >= limit:
+            break
+        chunk = port.read(port.in_waiting or 1)
+        if not chunk:
+            continue
+        last = time.monotonic()
+        frames = decoder.feed(chunk)
+        if frames:
+            return frames[0], True
+    return decoder.flush(), False
+
+
+def _set_timeout(port, timeout):
+    if getattr(port, "timeout", timeout) != timeout:
+        port.timeout = timeout
+
+
+def expected_response_size(frame):
+    """
+    So'rov kadridan kutilgan eng qisqa javob uzunligi (bayt). Monitor bajarish (y)
+    va tahlil qilib bo'lmaydigan so'rovlar uchun NAK uzunligi olinadi.
+    """
+    use_bcc = frame_uses_bcc(frame)
+    nak = 11 + (2 if use_bcc else 0)          # NAK st cmd type(2) code(4) ETX
+    short = 7 + (2 if use_bcc else 0)         # ACK st cmd type/slot(2) ETX
+    cmd = frame[3:4].lower()
+    if cmd in (b"w", b"x"):
+        return short
+    if cmd != b"r":
+        return nak
+    try:
+        body = frame[4:frame.index(b"\x04")].decode("ascii")
+        if body[:2] == "SB":
+            name_len = int(body[2:4], 16)
+            name = body[4:4 + name_len]
+            count = int(body[4 + name_len:6 + name_len], 16)
+            return _response_size([count * _TYPE_BYTES.get(name[2:3], 2)], use_bcc)
+        blocks, pos, sizes = int(body[2:4], 16), 4, []
+        for _ in range(blocks):
+            name_len = int(body[pos:pos + 2], 16)
+            sizes.append(_TYPE_BYTES.get(body[pos + 4:pos + 5], 2))
+            pos += 2 + name_len
+        return _response_size(sizes, use_bcc)
+    except (ValueError, IndexError):
+        return nak
+
+
+_TYPE_BYTES = {"X": 1, "B": 1, "W": 2, "D": 4, "L": 8}
@@ -0,0 +1,259 @@
+# ------------------------------------------------------------
+# GUI siz ishlash rejimi (edge qurilma): teglar ro'yxatini davriy
+# o'qib, qiymatlarni JSON qatorlari yoki CSV sifatida stdout yoki
+# faylga chiqaradi. customtkinter / tkinter import qilinmaydi.
+#
+#   python xgt_daemon.py --port /dev/ttyUSB0 --baud 115200 --tags tags.txt
+#   python xgt_daemon.py --port tcp://192.168.0.50:4001 --tag %MW200 --tag 3:%MW210 --format csv
+#
+# Teglar fayli: har qatorda "teg [davr_ms] [deadband]", '#' - izoh:
+#   0:%MW200   50
+#   3:%MW210  100  2
+# ------------------------------------------------------------
+import argparse
+import csv
+import json
+import signal
+import sys
+import threading
+import time
+from concurrent.futures import CancelledError
+
+import xgt_cnet as cnet
+import xgt_values as xv
+from xgt_link import PRIORITY_POLL
+from xgt_scan import ScanScheduler, ChangeFilter
+from xgt_supervisor import PortSupervisor
+
+STATS_INTERVAL = 60.0
+
+
+def load_tags(path, default_period, default_station=0):
+    """Teglar fayli -> [(teg, davr_s, deadband yoki None)]"""
+    tags = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            fields = line.split("#", 1)[0].split()
+            if not fields:
+                continue
+            tag = cnet.format_tag(*cnet.parse_tag(fields[0], default_station))
+            period = float(fields[1]) / 1000 if len(fields) > 1 else default_period
+            band = float(fields[2]) if len(fields) > 2 else None
+            tags.append((tag, period, band))
+    return tags
+
+
+class Output:
+    """JSON qatorlari yoki CSV; har bir rejadan keyin bir marta flush"""
+    COLUMNS = ("t", "tag", "status", "value", "hex")
+
+    def __init__(self, stream, fmt):
+        self.stream = stream
+        self.fmt = fmt
+        self.lock = threading.Lock()
+        self.rows = 0
+        if fmt == "csv":
+            self.writer = csv.writer(stream)
+            if _is_empty(stream):            # --output faylga qo'shib yoziladi: sarlavha bir marta
+                self.writer.writerow(self.COLUMNS)
+
+    def write(self, records):
+        if not records:
+            return
+        with self.lock:
+            if self.fmt == "csv":
+                self.writer.writerows(records)
+            else:
+                self.stream.write("".join(
+                    json.dumps(dict(zip(self.COLUMNS, r)), separators=(",", ":")) + "\n" for r in records))
+            self.stream.flush()
+            self.rows += len(records)
+
+
+def _is_empty(stream):
+    try:
+        return stream.tell() == 0
+    except (OSError, ValueError):            # pipe / terminal
+        return True
+
+
+class Daemon:
+    def __init__(self, args, tags, output):
+        self.args = args
+        self.output = output
+        self.table = cnet.TagTable(args.station, args.bcc)
+        self.monitors = {}                   # stansiya -> MonitorTable
+        self.changes = ChangeFilter(max_interval=args.max_interval) if args.changes_only else None
+        if self.changes is not None:
+            for tag, _, band in tags:
+                self.changes.configure(tag, band if band is not None else args.deadband)
+        self.scanner = ScanScheduler(self.plan, self.execute, on_error=self.scan_error)
+        self.scanner.set_tags({tag: period for tag, period, _ in tags})
+        self.supervisor = PortSupervisor(args.port, args.baud, worker_name="xgt-daemon-io",
+                                         on_connect=self.connected, on_lost=self.lost)
+        self.errors = 0
+        self.stop_event = threading.Event()
+
+    # ---------- Port (PortSupervisor fon oqimida qayta ochadi) ----------
+    def connected(self, io):
+        for table in self.monitors.values():       # yangi ulanishda monitorlar qayta ro'yxatdan o'tadi
+            table.invalidate()
+        outage = self.supervisor.last_outage
+        log(f"connected {self.args.port} ({self.args.baud} bps)"
+            + (f" after {outage:.2f}s outage" if outage is not None else ""))
+
+    def lost(self, error):
+        log(f"connection lost: {error}; waiting for the port")
+
+    # ---------- Rejalash va bajarish (ScanScheduler oqimida) ----------
+    def plan(self, tags):
+        plan = self.table.plan(tags, self.args.gap)
+        if not self.args.monitor:
+            return plan
+        bound = []
+        for station in sorted({req.station for req in plan}):
+            table = self.monitors.setdefault(station, cnet.MonitorTable())
+            bound += table.bind([req for req in plan if req.station == station])
+        return bound
+
+    def execute(self, plan):
+        io = self.supervisor.io
+        if io is None:
+            return False                     # port yo'q: rejalashtiruvchi o'qildi deb hisoblamaydi
+        use_bcc = self.args.bcc
+        pending = []
+        for req in plan:
+            if req.kind == "MON":
+                table = self.monitors[req.station]
+                if not table.is_registered(req.slot, req.station):
+                    pending.append((req, "x", io.submit(req.register_frame(req.station, use_bcc), PRIORITY_POLL)))
+            pending.append((req, "r", io.submit(req.build_frame(req.station, use_bcc), PRIORITY_POLL)))
+
+        now = time.time()
+        records = []
+        for req, kind, future in pending:
+            try:
+                reply = future.result()
+            except CancelledError:
+                continue                     # bekor qilingan (yopilish)
+            except Exception as e:           # port xatosi yoki IOWorker dagi kutilmagan xato
+                self.errors += 1
+                self.supervisor.lost(io, e)
+                return False
+            if reply.skipped:                # stansiya kutishda (backoff)
+                continue
+            decoded = cnet.decode_response(reply.request, reply.frame, reply.complete)
+            if kind == "x":
+                if decoded.status == "ACK":
+                    self.monitors[req.station].mark_registered(req.slot, req.station)
+                continue
+            if decoded.status != "ACK":
+                self.errors += 1
+                if req.kind == "MON" and decoded.error == "0090":
+                    self.monitors[req.station].invalidate(req.slot)
+                status = decoded.error if decoded.status == "NAK" else decoded.status
+                records += [(round(now, 3), cnet.format_tag(req.station, a), status, None, None) for a in req.addresses]
+                continue
+            pairs = req.split_values(decoded.blocks)
+            try:
+                numbers = xv.decode_uniform([data for _, data in pairs]).tolist()
+            except ValueError:
+                numbers = [hex_value(data) for _, data in pairs]
+            for (addr, data), value in zip(pairs, numbers):
+                tag = cnet.format_tag(req.station, addr)
+                if value is None:            # BCC siz kadrda buzilgan ma'lumot
+                    self.errors += 1
+                    records.append((round(now, 3), tag, "BAD", None, data))
+                elif self.changes is None or self.changes.accept(tag, value):
+                    records.append((round(now, 3), tag, "OK", value, data))
+        self.output.write(records)
+        return True
+
+    def scan_error(self, error):
+        self.errors += 1
+        log(f"scan error: {type(error).__name__}: {error}")
+
+    # ---------- Asosiy sikl ----------
+    def run(self):
+        log(f"opening {self.args.port}")
+        if not self.supervisor.connect():
+            return
+        self.scanner.start()
+        started = last_stats = time.monotonic()
+        while not self.stop_event.wait(0.5):
+            now = time.monotonic()
+            if self.args.duration and now - started >= self.args.duration:
+                break
+            if now - last_stats >= self.args.stats:
+                last_stats = now
+                self.report()
+        self.scanner.stop()
+        self.supervisor.close()
+        self.report()
+
+    def stop(self):
+        """Signal ishlovchisidan: sikl va port kutishini to'xtatish"""
+        self.stop_event.set()
+        self.supervisor.close()
+
+    def report(self):
+        link = self.supervisor.stats()
+        parts = [f"rows={self.output.rows}", f"errors={self.errors}", f"outages={link['outages']}"]
+        if self.changes is not None:
+            parts.append(f"suppressed={self.changes.suppressed}")
+        for tag, st in self.scanner.stats().items():
+            parts.append(f"{tag}:{st['rate_hz']}Hz ovr={st['overruns']}"
+                         + (f" skip={st['skipped']}" if st['skipped'] else ""))
+        log(" ".join(parts))
+
+
+def hex_value(data):
+    try:
+        return int(data, 16)
+    except ValueError:
+        return None
+
+
+def log(message):
+    print(f"# {time.strftime('%Y-%m-%d %H:%M:%S')} {message}", file=sys.stderr, flush=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless XGT Cnet poller")
+    parser.add_argument("--port", required=True, help="COM10, /dev/ttyUSB0 or tcp://host:port")
+    parser.add_argument("--baud", type=int, default=115200)
+    parser.add_argument("--station", type=int, default=0, help="station for tags without 'st:' prefix")
+    parser.add_argument("--no-bcc", dest="bcc", action="store_false")
+    parser.add_argument("--monitor", action="store_true", help="use monitor X/Y frames")
+    parser.add_argument("--gap", type=int, default=4, help="rSB gap (see plan_reads)")
+    parser.add_argument("--tags", help="tag list file")
+    parser.add_argument("--tag", action="append", default=[], help="tag to poll (repeatable)")
+    parser.add_argument("--period", type=float, default=100.0, help="default poll period in ms")
+    parser.add_argument("--format", choices=["jsonl", "csv"], default="jsonl")
+    parser.add_argument("--output", help="append to this file instead of stdout")
+    parser.add_argument("--changes-only", action="store_true", help="emit a value only when it changes")
+    parser.add_argument("--deadband", type=float, default=0.0, help="default absolute deadband for --changes-only")
+    parser.add_argument("--max-interval", type=float, default=60.0, help="--changes-only: re-emit at least this often (s)")
+    parser.add_argument("--duration", type=float, help="stop after this many seconds")
+    parser.add_argument("--stats", type=float, default=STATS_INTERVAL, help="stats line to stderr every N seconds")
+    args = parser.parse_args(argv)
+
+    default_period = args.period / 1000
+    tags = load_tags(args.tags, default_period, args.station) if args.tags else []
+    tags += [(cnet.format_tag(*cnet.parse_tag(t, args.station)), default_period, None) for t in args.tag]
+    if not tags:
+        parser.error("no tags: use --tags FILE or --tag ADDR")
+
+    stream = open(args.output, "a", encoding="utf-8", newline="") if args.output else sys.stdout
+    daemon = Daemon(args, tags, Output(stream, args.format))
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: daemon.stop())
+    try:
+        daemon.run()
+    finally:
+        if stream is not sys.stdout:
+            stream.close()
+
+
+if __name__ == "__main__":
+    main()
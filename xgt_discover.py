@@ -0,0 +1,149 @@
+# ------------------------------------------------------------
+# Ishga tushirishda PLC larni qidirish: har bir port uchun standart
+# Cnet baud tezliklari va 0-31 stansiyalar eng qisqa o'qish so'rovi
+# (rSS %MB0) bilan tekshiriladi. Kutish vaqti sim vaqtidan
+# hisoblanadi (1.5 s emas), portlar parallel tekshiriladi. Bitta
+# shinadagi hamma qurilma bir xil tezlikda bo'lgani uchun javob
+# topilgan tezlikdan keyin qolgan tezliklar o'tkazib yuboriladi.
+#
+#   python xgt_discover.py                      # hamma COM / ttyUSB portlar
+#   python xgt_discover.py --port COM3 --port COM4 --bauds 9600,115200 --json
+# Bu modul GUI ga bog'liq emas.
+# ------------------------------------------------------------
+import argparse
+import json
+import sys
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from serial.tools import list_ports
+
+import xgt_cnet as cnet
+from xgt_link import BITS_PER_CHAR, GAP_CHARS, MIN_GAP
+from xgt_transport import open_transport, TCP_PREFIX
+
+# Tez-tez uchraydiganlari oldin: topilgach qolganlari tekshirilmaydi
+STANDARD_BAUDS = (115200, 9600, 19200, 38400, 57600)
+SLOW_BAUDS = (4800, 2400, 1200)
+STATIONS = range(32)
+PROBE_ADDRESS = "%MB0"       # javob 1 bayt; NAK ham stansiya borligini bildiradi
+ALLOWANCE = 0.03             # s: PLC javob berishni boshlashiga sim vaqtidan ortiq vaqt
+TCP_ALLOWANCE = 0.15         # s: gateway da sim vaqti noma'lum, tarmoq kechikishi qo'shiladi
+
+# bcc: "bcc" (faqat kichik harfli buyruqqa javob beradi) yoki "both" (ikkalasiga ham)
+Found = namedtuple("Found", "port baud station bcc status")
+
+
+def probe_timeout(frame, baud, allowance=ALLOWANCE):
+    """So'rov + eng qisqa javobning sim vaqti + zaxira; TCP da (baud None) faqat zaxira"""
+    wire = (len(frame) + cnet.expected_response_size(frame)) * BITS_PER_CHAR / baud if baud else 0.0
+    return wire + allowance
+
+
+def probe(port, station, use_bcc, baud, allowance=ALLOWANCE):
+    """Bitta stansiyani so'rash. Javob (ACK / NAK) bo'lsa status, aks holda None"""
+    frame = cnet.build_read_frame(station, [PROBE_ADDRESS], use_bcc)
+    gap = max(MIN_GAP, GAP_CHARS * BITS_PER_CHAR / baud) if baud else None
+    port.reset_input_buffer()
+    port.write(frame)
+    response, complete = cnet.read_frame(port, use_bcc, probe_timeout(frame, baud, allowance), gap)
+    if not response or cnet.frame_error(frame, response, complete):
+        return None
+    decoded = cnet.decode_response(frame, response, complete)
+    if decoded.station != station or decoded.status not in ("ACK", "NAK"):
+        return None                          # boshqa qurilma yoki noto'g'ri tezlikdagi shovqin
+    return decoded.status
+
+
+def scan_port(name, bauds=STANDARD_BAUDS, stations=STATIONS, allowance=ALLOWANCE,
+              all_bauds=False, on_found=None):
+    """
+    Bitta portni tekshirish -> [Found]. Har bir stansiya avval BCC li so'rov bilan,
+    javob bergani yana BCC siz so'rov bilan (rejimni aniqlash uchun) tekshiriladi.
+    TCP gateway da tezlik gateway tomonida - faqat stansiyalar tekshiriladi.
+    """
+    if name.lower().startswith(TCP_PREFIX):
+        bauds = (None,)
+        allowance = max(allowance, TCP_ALLOWANCE)
+    found = []
+    for baud in bauds:
+        try:
+            port = open_transport(name, baud or 115200, timeout=cnet.READ_SLICE)
+        except OSError:
+            return found                     # band yoki yo'q port
+        try:
+            for station in stations:
+                status = probe(port, station, True, baud, allowance)
+                if status is None:
+                    continue
+                plain = probe(port, station, False, baud, allowance)
+                item = Found(name, baud, station, "both" if plain else "bcc", status)
+                found.append(item)
+                if on_found:
+                    on_found(item)
+        except OSError:
+            return found                     # port skan paytida yo'qoldi
+        finally:
+            port.close()
+        if found and not all_bauds:
+            break
+    return found
+
+
+def candidate_ports():
+    """Tizimdagi serial portlar (COM*, /dev/ttyUSB*, /dev/ttyACM* ...)"""
+    return sorted(p.device for p in list_ports.comports())
+
+
+def discover(ports=None, bauds=STANDARD_BAUDS, stations=STATIONS, allowance=ALLOWANCE,
+             all_bauds=False, on_found=None):
+    """Hamma portlarni parallel tekshirish -> [Found] (port, tezlik, stansiya tartibida)"""
+    ports = list(ports) if ports else candidate_ports()
+    if not ports:
+        return []
+    with ThreadPoolExecutor(max_workers=len(ports), thread_name_prefix="xgt-discover") as pool:
+        results = pool.map(lambda name: scan_port(name, bauds, stations, allowance, all_bauds, on_found), ports)
+        return [item for items in results for item in items]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Find XGT Cnet stations on serial ports / gateways")
+    parser.add_argument("--port", action="append", default=[], help="port to scan (repeatable; default: all serial ports)")
+    parser.add_argument("--bauds", help="comma separated baud rates (default: %s)" % ",".join(map(str, STANDARD_BAUDS)))
+    parser.add_argument("--slow", action="store_true", help="also try %s bps" % "/".join(map(str, SLOW_BAUDS)))
+    parser.add_argument("--stations", default="0-31", help="station range, e.g. 0-31 or 0,3,5")
+    parser.add_argument("--allowance", type=float, default=ALLOWANCE * 1000, help="PLC turnaround allowance in ms")
+    parser.add_argument("--all-bauds", action="store_true", help="keep sweeping after a baud rate answers")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args(argv)
+
+    bauds = tuple(int(b) for b in args.bauds.split(",")) if args.bauds else STANDARD_BAUDS
+    if args.slow:
+        bauds += SLOW_BAUDS
+    stations = []
+    for part in args.stations.split(","):
+        lo, _, hi = part.partition("-")
+        stations += range(int(lo), int(hi or lo) + 1)
+
+    ports = args.port or candidate_ports()
+    if not ports:
+        sys.exit("no serial ports found; use --port")
+    print(f"# scanning {', '.join(ports)} at {'/'.join(map(str, bauds))} bps, stations {args.stations}",
+          file=sys.stderr, flush=True)
+    started = time.monotonic()
+    report = lambda f: print(f"# found {f.port} {f.baud or '-'} bps station {f.station} ({f.bcc}, {f.status})",
+                             file=sys.stderr, flush=True)
+    found = discover(ports, bauds, stations, args.allowance / 1000, args.all_bauds, report)
+    elapsed = time.monotonic() - started
+
+    if args.json:
+        print(json.dumps({"elapsed_s": round(elapsed, 2), "found": [f._asdict() for f in found]}, indent=2))
+    else:
+        for f in found:
+            print(f"{f.port}\t{f.baud or '-'}\t{f.station}\t{f.bcc}\t{f.status}")
+        print(f"# {len(found)} station(s) in {elapsed:.2f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
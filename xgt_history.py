@@ -0,0 +1,233 @@
+# ------------------------------------------------------------
+# Jarayon ichidagi tarix (historian): har bir teg uchun massivga
+# asoslangan halqa buferlar va 1 s / 1 min / 1 soat yig'indilari
+# (min/max/o'rtacha). Xotira oldindan belgilanadi: teg boshiga
+# bayt soni sig'imlardan hisoblanadi, byudjetdan ortiq teg olinmaydi.
+#
+# Standart sig'imlar (teg boshiga ~440 KB):
+#   xom      6000 namuna  (50 ms da 5 daqiqa)   16 B/namuna
+#   1 s      3600 qator   (1 soat)              24 B/qator
+#   1 min   10080 qator   (1 hafta)
+#   1 soat    672 qator   (4 hafta)
+# 300 teg -> ~130 MB, bir haftalik 50 ms oqim 1 min darajasida to'liq saqlanadi.
+# Bu modul GUI ga bog'liq emas.
+# ------------------------------------------------------------
+import csv
+import threading
+
+import numpy as np
+
+RAW = "raw"
+TIERS = (("1s", 1.0), ("1m", 60.0), ("1h", 3600.0))
+DEFAULT_CAPACITY = {RAW: 6000, "1s": 3600, "1m": 10080, "1h": 672}
+DEFAULT_BUDGET = 256 * 1024 * 1024
+
+RAW_DTYPE = np.dtype([("t", "<f8"), ("value", "<f8")])
+ROLLUP_DTYPE = np.dtype([("t", "<f8"), ("min", "<f4"), ("max", "<f4"), ("mean", "<f4"), ("count", "<u4")])
+
+
+class Ring:
+    """Tuzilmali NumPy massividagi halqa bufer; vaqt o'sib boradi deb olinadi"""
+
+    def __init__(self, capacity, dtype):
+        self.data = np.zeros(capacity, dtype)
+        self.capacity = capacity
+        self.head = 0            # keyingi yoziladigan joy
+        self.size = 0
+
+    def append(self, row):
+        self.data[self.head] = row
+        self.head = (self.head + 1) % self.capacity
+        if self.size < self.capacity:
+            self.size += 1
+
+    def segments(self):
+        """Xronologik tartibdagi ikki bo'lak (nusxasiz ko'rinishlar)"""
+        if self.size < self.capacity:
+            return (self.data[:self.size],)
+        return self.data[self.head:], self.data[:self.head]
+
+    def range(self, start=None, end=None):
+        """[start, end] oralig'idagi qatorlar (nusxa); har bir bo'lakda ikkilik qidiruv"""
+        parts = []
+        for seg in self.segments():
+            t = seg["t"]
+            lo = 0 if start is None else np.searchsorted(t, start, "left")
+            hi = len(seg) if end is None else np.searchsorted(t, end, "right")
+            if hi > lo:
+                parts.append(seg[lo:hi])
+        if not parts:
+            return np.zeros(0, self.data.dtype)
+        return np.concatenate(parts)
+
+    @property
+    def first_time(self):
+        if not self.size:
+            return None
+        return float(self.segments()[0]["t"][0])
+
+
+class _Bucket:
+    """Joriy (hali yopilmagan) yig'indi oralig'i"""
+    __slots__ = ("index", "t", "min", "max", "sum", "count")
+
+    def __init__(self):
+        self.index = None
+
+
+class TagHistory:
+    def __init__(self, capacity):
+        self.raw = Ring(capacity[RAW], RAW_DTYPE)
+        self.tiers = {name: Ring(capacity[name], ROLLUP_DTYPE) for name, _ in TIERS}
+        self.buckets = [_Bucket() for _ in TIERS]
+        self.last_t = None
+
+    def record(self, t, value):
+        if self.last_t is not None and t < self.last_t:
+            t = self.last_t                   # soat orqaga ketsa ham tartib buzilmaydi
+        self.last_t = t
+        self.raw.append((t, value))
+        self._roll(0, t, value, value, value, 1)
+
+    def _roll(self, level, t, lo, hi, total, count):
+        """Kaskad: xom -> 1 s -> 1 min -> 1 soat; yuqori daraja faqat quyi qator yopilganda ishlaydi"""
+        name, width = TIERS[level]
+        bucket = self.buckets[level]
+        index = int(t // width)
+        if bucket.index != index:
+            if bucket.index is not None:
+                self._close(level)
+            bucket.index, bucket.t = index, index * width
+            bucket.min, bucket.max, bucket.sum, bucket.count = lo, hi, total, count
+            return
+        if lo < bucket.min:
+            bucket.min = lo
+        if hi > bucket.max:
+            bucket.max = hi
+        bucket.sum += total
+        bucket.count += count
+
+    def _close(self, level):
+        name, _ = TIERS[level]
+        b = self.buckets[level]
+        self.tiers[name].append((b.t, b.min, b.max, b.sum / b.count, b.count))
+        if level + 1 < len(TIERS):
+            self._roll(level + 1, b.t, b.min, b.max, b.sum, b.count)
+
+    def open_row(self, level):
+        """Hali yopilmagan oraliq (so'rov natijasiga qo'shiladi)"""
+        b = self.buckets[level]
+        if b.index is None:
+            return None
+        return np.array([(b.t, b.min, b.max, b.sum / b.count, b.count)], ROLLUP_DTYPE)
+
+
+class Historian:
+    """
+    Teglar tarixi. record() istalgan oqimdan chaqiriladi; query() massivlar qaytaradi.
+    budget_bytes: jami xotira chegarasi; unga sig'maydigan yangi teglar yozilmaydi
+    (rejected hisoblagichi oshadi).
+    """
+
+    def __init__(self, budget_bytes=DEFAULT_BUDGET, capacity=None):
+        self.capacity = dict(DEFAULT_CAPACITY, **(capacity or {}))
+        self.tag_bytes = (self.capacity[RAW] * RAW_DTYPE.itemsize
+                          + sum(self.capacity[name] for name, _ in TIERS) * ROLLUP_DTYPE.itemsize)
+        self.max_tags = max(1, budget_bytes // self.tag_bytes)
+        self.tags = {}
+        self.rejected = 0
+        self.lock = threading.Lock()
+
+    @property
+    def memory_bytes(self):
+        return len(self.tags) * self.tag_bytes
+
+    def record(self, tag, value, t):
+        """t: epoch soniya (time.time())"""
+        with self.lock:
+            history = self.tags.get(tag)
+            if history is None:
+                if len(self.tags) >= self.max_tags:
+                    self.rejected += 1
+                    return
+                history = self.tags[tag] = TagHistory(self.capacity)
+            history.record(t, value)
+
+    def query(self, tag, start=None, end=None, tier=RAW):
+        """
+        Oraliqdagi qatorlar: tier='raw' -> (t, value), '1s'/'1m'/'1h' -> (t, min, max, mean, count).
+        tier='auto' - start ni hali qamrab turgan eng mayda daraja.
+        """
+        with self.lock:
+            history = self.tags.get(tag)
+            if history is None:
+                return np.zeros(0, RAW_DTYPE if tier == RAW else ROLLUP_DTYPE)
+            if tier == "auto":
+                tier = self._pick_tier(history, start)
+            if tier == RAW:
+                return history.raw.range(start, end)
+            level = [name for name, _ in TIERS].index(tier)
+            rows = history.tiers[tier].range(start, end)
+            current = history.open_row(level)
+            if current is not None and (end is None or current["t"][0] <= end) \
+                    and (start is None or current["t"][0] >= start):
+                rows = np.concatenate([rows, current])
+            return rows
+
+    def _pick_tier(self, history, start):
+        if start is None:
+            return TIERS[-1][0]
+        for name, ring in [(RAW, history.raw)] + [(n, history.tiers[n]) for n, _ in TIERS]:
+            first = ring.first_time
+            if first is not None and first <= start and ring.size:
+                return name
+        return TIERS[-1][0]
+
+    def stats(self):
+        with self.lock:
+            return {
+                "tags": len(self.tags),
+                "max_tags": self.max_tags,
+                "tag_bytes": self.tag_bytes,
+                "memory_bytes": self.memory_bytes,
+                "rejected": self.rejected,
+            }
+
+    # ---------- Eksport ----------
+    def _export_rows(self, tags, start, end, tier):
+        for tag in (tags if tags is not None else sorted(self.tags)):
+            yield tag, self.query(tag, start, end, tier)
+
+    def export_csv(self, path, tags=None, start=None, end=None, tier=RAW):
+        """Bitta CSV: tag, t, keyin tier ustunlari. Qaytaradi: yozilgan qatorlar soni"""
+        columns = list(RAW_DTYPE.names if tier == RAW else ROLLUP_DTYPE.names)
+        count = 0
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["tag"] + columns)
+            for tag, rows in self._export_rows(tags, start, end, tier):
+                if not len(rows):
+                    continue
+                cols = [rows[c].tolist() for c in columns]
+                writer.writerows([tag] + list(r) for r in zip(*cols))
+                count += len(rows)
+        return count
+
+    def export_parquet(self, path, tags=None, start=None, end=None, tier=RAW):
+        """Parquet eksport (pyarrow kerak). Qaytaradi: yozilgan qatorlar soni"""
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Parquet export needs pyarrow (pip install pyarrow)")
+        columns = list(RAW_DTYPE.names if tier == RAW else ROLLUP_DTYPE.names)
+        names, parts = [], []
+        for tag, rows in self._export_rows(tags, start, end, tier):
+            if len(rows):
+                names.append(np.full(len(rows), tag, dtype=object))
+                parts.append(rows)
+        rows = np.concatenate(parts) if parts else np.zeros(0, RAW_DTYPE if tier == RAW else ROLLUP_DTYPE)
+        table = pa.table({"tag": np.concatenate(names) if names else np.zeros(0, object),
+                          **{c: rows[c] for c in columns}})
+        pq.write_table(table, path)
+        return len(rows)
@@ -0,0 +1,363 @@
+# ------------------------------------------------------------
+# Portni yagona egasi: bitta I/O oqimi so'rovlarni ustuvorlik
+# navbatidan olib, ketma-ket yuboradi. RS-485 shinasida bir nechta
+# stansiya bo'lsa, ular navbatma-navbat (round-robin) xizmat qilinadi.
+# Bu modul GUI ga bog'liq emas.
+# ------------------------------------------------------------
+import threading
+import time
+from collections import deque, namedtuple
+from concurrent.futures import Future
+
+import xgt_cnet as cnet
+from xgt_capture import TX, RX
+
+PRIORITY_WRITE = 0       # operator yozishi - eng birinchi
+PRIORITY_READ = 1        # operator o'qishi
+PRIORITY_POLL = 2        # fon so'rovlari
+
+BACKOFF_BASE = 0.5       # javob bermagan stansiya uchun birinchi kutish (s)
+BACKOFF_MAX = 16.0       # eng uzun kutish; shundan keyin ham vaqti-vaqti bilan tekshiriladi
+
+# Moslashuvchan timeout: sim vaqti (belgi vaqti x uzunlik) + PLC skan zaxirasi.
+# Zaxira TCP RTO kabi silliqlangan RTT dan hisoblanadi: srtt + 4 * rttvar.
+BITS_PER_CHAR = 10       # 8N1: start + 8 bit + stop
+INITIAL_ALLOWANCE = 0.5  # s: hali o'lchov yo'q paytdagi zaxira
+MIN_ALLOWANCE = 0.02     # s: USB adapter kechikishi va OS rejalashtiruvchisi uchun
+MIN_GAP = 0.05           # s: javob ichidagi baytlar orasidagi eng uzun tanaffus (pastki chegara)
+GAP_CHARS = 20           # ... yoki shuncha belgi vaqti, qaysi biri katta bo'lsa
+
+MAX_RETRIES = 2          # buzilgan / chala javobda darhol qayta yuborishlar soni
+RETRY_BUDGET = 0.5       # s: bitta so'rov uchun qayta yuborishlarga ajratilgan vaqt
+
+# request: yuborilgan kadr, frame: javob, complete: ETX (+BCC) to'liq keldimi, rtt: s,
+# skipped: stansiya kutishda bo'lgani uchun shinaga chiqarilmagan,
+# retries: qayta yuborishlar, error: oxirgi javob yaroqsiz bo'lsa sababi (cnet.frame_error)
+Reply = namedtuple("Reply", "request frame complete rtt skipped retries error", defaults=(False, 0, None))
+
+
+class Transaction:
+    def __init__(self, frame, priority=PRIORITY_POLL, timeout=None):
+        self.frame = frame
+        self.priority = priority
+        self.timeout = timeout               # None - moslashuvchan (TimeoutEstimator)
+        self.station = int(frame[1:3])
+        self.future = Future()
+
+
+class TimeoutEstimator:
+    """
+    RFC 6298 uslubida: javob vaqtidan sim vaqti ayirilgan qoldiq (PLC skani +
+    adapter kechikishi) silliqlanadi. Timeout bo'lsa zaxira TCP RTO kabi ikki
+    barobar oshadi (RESPONSE_TIMEOUT gacha), muvaffaqiyatda tiklanadi. Hali javob
+    bermagan stansiya uchun butun shinaning bahosi (prior) olinadi.
+    """
+
+    def __init__(self):
+        self.srtt = None
+        self.rttvar = None
+        self.penalty = 1
+
+    def allowance(self, prior=None):
+        source = self if self.srtt is not None else prior
+        if source is None or source.srtt is None:
+            base = INITIAL_ALLOWANCE
+        else:
+            base = source.srtt + 4 * source.rttvar
+        return min(cnet.RESPONSE_TIMEOUT, max(MIN_ALLOWANCE, base) * self.penalty)
+
+    def sample(self, residual):
+        residual = max(0.0, residual)
+        if self.srtt is None:
+            self.srtt, self.rttvar = residual, residual / 2
+        else:
+            self.rttvar = 0.75 * self.rttvar + 0.25 * abs(self.srtt - residual)
+            self.srtt = 0.875 * self.srtt + 0.125 * residual
+        self.penalty = 1
+
+    def timed_out(self):
+        # Zaxira RESPONSE_TIMEOUT ga yetgach penalty ni oshirish ma'nosiz
+        if self.allowance() < cnet.RESPONSE_TIMEOUT:
+            self.penalty *= 2
+
+
+class StationStats:
+    """Stansiya bo'yicha: o'tkazuvchanlik, kechikish va kutish (backoff) holati"""
+
+    def __init__(self):
+        self.estimator = TimeoutEstimator()
+        self.lost = 0.0                  # s: javobsiz so'rovlarda kutilgan vaqt
+        self.lost_fixed = 0.0            # s: o'sha so'rovlar qat'iy timeout bilan qancha olardi
+        self.last_timeout = None         # s: oxirgi ishlatilgan birinchi bayt muddati
+        self.retries = 0                 # darhol qayta yuborishlar
+        self.corrupt = 0                 # BCC mos kelmagan javoblar
+        self.truncated = 0               # chala qolgan javoblar
+        self.late = 0                    # zaxiradan keyin, RESPONSE_TIMEOUT ichida kelgan javoblar
+        self.stale = 0                   # boshqa so'rovga tegishli bo'lib tashlangan kadrlar
+        self.requests = 0
+        self.responses = 0
+        self.timeouts = 0
+        self.skipped = 0
+        self.rtt_avg = None
+        self.failures = 0                # ketma-ket javobsizlar
+        self.backoff_until = 0.0
+        self.first = None
+        self.last = None
+
+    def record(self, reply, now):
+        self.requests += 1
+        if self.first is None:
+            self.first = now
+        self.last = now
+        if reply.frame:
+            self.responses += 1
+            self.failures = 0
+            self.backoff_until = 0.0
+            self.rtt_avg = reply.rtt if self.rtt_avg is None else 0.875 * self.rtt_avg + 0.125 * reply.rtt
+        else:
+            self.timeouts += 1
+            self.failures += 1
+            self.backoff_until = now + min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (self.failures - 1))
+            self.lost += reply.rtt
+            self.lost_fixed += cnet.RESPONSE_TIMEOUT
+
+    def snapshot(self, now):
+        span = (self.last - self.first) if self.first is not None else 0.0
+        return {
+            "requests": self.requests,
+            "responses": self.responses,
+            "timeouts": self.timeouts,
+            "skipped": self.skipped,
+            "tx_per_s": round(self.responses / span, 1) if span > 0 else 0.0,
+            "rtt_ms": round(self.rtt_avg * 1000, 1) if self.rtt_avg is not None else None,
+            "backoff_s": round(max(0.0, self.backoff_until - now), 1),
+            "timeout_ms": round(self.last_timeout * 1000, 1) if self.last_timeout is not None else None,
+            "lost_s": round(self.lost, 2),
+            "lost_fixed_s": round(self.lost_fixed, 2),
+            "retries": self.retries,
+            "corrupt": self.corrupt,
+            "truncated": self.truncated,
+            "late": self.late,
+            "stale": self.stale,
+        }
+
+
+class IOWorker:
+    """
+    Bitta port uchun bitta oqim. submit() darhol Future qaytaradi;
+    natija Reply, port xatosi bo'lsa Future da istisno (SerialException).
+    Port xato bergach oqim to'xtaydi: navbatdagi va keyin yuborilgan hamma
+    so'rovlar o'sha xato bilan tugaydi (error), shina boshqa band qilinmaydi.
+
+    Har bir ustuvorlik darajasida har bir stansiyaning o'z navbati bor; navbatdagi
+    stansiya aylana tartibda tanlanadi, shuning uchun sekin yoki o'lik stansiya
+    boshqalarni to'xtatib qo'ymaydi. Javob bermagan stansiyaning fon so'rovlari
+    kutish vaqti tugaguncha shinaga chiqarilmaydi (skipped), keyin bitta so'rov
+    sinov sifatida yuboriladi.
+    """
+
+    def __init__(self, port, name="xgt-io", capture=None, adaptive=True):
+        self.port = port
+        self.capture = capture               # CaptureWriter yoki None
+        self.adaptive = adaptive             # False - har doim RESPONSE_TIMEOUT
+        baud = getattr(port, "baudrate", None)
+        self.char_time = BITS_PER_CHAR / baud if baud else 0.0   # TCP da sim vaqti yo'q
+        self.bus = TimeoutEstimator()        # hamma stansiyalar bo'yicha umumiy baho
+        self.queues = {}                     # ustuvorlik -> {stansiya: deque}
+        self.cond = threading.Condition()
+        self.stations = {}                   # stansiya -> StationStats
+        self._last_station = -1
+        self._closed = False
+        self.error = None                    # portni to'xtatgan istisno
+        self.completed = 0
+        self.failed = 0
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, frame, priority=PRIORITY_POLL, timeout=None):
+        tx = Transaction(frame, priority, timeout)
+        with self.cond:
+            if self._closed:
+                tx.future.cancel()
+            elif self.error is not None:
+                tx.future.set_exception(self.error)
+            else:
+                self.queues.setdefault(priority, {}).setdefault(tx.station, deque()).append(tx)
+                self.cond.notify()
+        return tx.future
+
+    def transact(self, frame, priority=PRIORITY_POLL, timeout=None):
+        """Bloklovchi variant (I/O oqimining o'zidan chaqirmang)"""
+        return self.submit(frame, priority, timeout).result()
+
+    @property
+    def depth(self):
+        with self.cond:
+            return sum(len(q) for level in self.queues.values() for q in level.values())
+
+    def station_stats(self):
+        now = time.monotonic()
+        with self.cond:
+            return {st: stats.snapshot(now) for st, stats in sorted(self.stations.items())}
+
+    def close(self):
+        """Navbatdagi so'rovlarni bekor qilib, oqimni to'xtatish va portni yopish"""
+        with self.cond:
+            if self._closed:
+                return
+            self._closed = True
+            self.cond.notify()
+        if self._thread is not threading.current_thread():
+            self._thread.join(timeout=cnet.RESPONSE_TIMEOUT + 1)
+        try:
+            self.port.close()
+        except Exception:
+            pass
+
+    def _next(self):
+        """Eng yuqori ustuvorlikdagi, aylana tartibda keyingi stansiyaning so'rovi"""
+        for priority in sorted(self.queues):
+            level = self.queues[priority]
+            ready = sorted(st for st, q in level.items() if q)
+            if not ready:
+                continue
+            station = next((st for st in ready if st > self._last_station), ready[0])
+            self._last_station = station
+            return level[station].popleft()
+        return None
+
+    def _run(self):
+        while True:
+            with self.cond:
+                tx = self._next()
+                while tx is None and not self._closed:
+                    self.cond.wait()
+                    tx = self._next()
+                if self._closed:
+                    if tx is not None:
+                        tx.future.cancel()
+                    break
+                stats = self.stations.setdefault(tx.station, StationStats())
+                # Kutishdagi stansiyaning fon so'rovi shinani band qilmaydi
+                skip = tx.priority == PRIORITY_POLL and time.monotonic() < stats.backoff_until
+                if skip:
+                    stats.skipped += 1
+            if not tx.future.set_running_or_notify_cancel():
+                continue
+            if skip:
+                tx.future.set_result(Reply(tx.frame, b"", False, 0.0, True))
+                continue
+            try:
+                reply = self._transact(tx, stats)
+            except Exception as e:
+                self.failed += 1
+                tx.future.set_exception(e)
+                with self.cond:
+                    self.error = e
+                break
+            else:
+                self.completed += 1
+                with self.cond:
+                    stats.record(reply, time.monotonic())
+                tx.future.set_result(reply)
+
+        # Yopilgandan keyin qolganlar bekor qilinadi, port xatosidan keyin - shu xato bilan tugaydi
+        with self.cond:
+            pending = [tx for level in self.queues.values() for q in level.values() for tx in q]
+            self.queues.clear()
+        for tx in pending:
+            if self.error is None:
+                tx.future.cancel()
+            elif tx.future.set_running_or_notify_cancel():
+                tx.future.set_exception(self.error)
+
+    def timeouts_for(self, frame, stats):
+        """(birinchi bayt muddati, baytlar orasidagi tanaffus) - sim vaqti + skan zaxirasi"""
+        wire = (len(frame) + cnet.expected_response_size(frame)) * self.char_time
+        gap = max(MIN_GAP, GAP_CHARS * self.char_time)
+        return wire + stats.estimator.allowance(self.bus), gap
+
+    def _transact(self, tx, stats):
+        """
+        So'rov-javob. Javob buzilgan (BCC) yoki chala bo'lsa, to'liq timeout ni
+        kutmasdan darhol qayta yuboriladi - MAX_RETRIES va RETRY_BUDGET doirasida.
+        Umuman javob bo'lmasa qayta yuborilmaydi (bu stansiya kutishi - backoff ishi).
+        """
+        if tx.timeout is not None or not self.adaptive:
+            timeout, gap = tx.timeout or cnet.RESPONSE_TIMEOUT, None
+        else:
+            timeout, gap = self.timeouts_for(tx.frame, stats)
+        stats.last_timeout = timeout
+        started = time.perf_counter()
+        retries = 0
+        while True:
+            frame, complete, rtt = self._exchange(tx.frame, timeout, gap, stats)
+            error = cnet.frame_error(tx.frame, frame, complete) if frame else None
+            if error == "BCC mismatch":
+                stats.corrupt += 1
+            elif error is not None:
+                stats.truncated += 1
+            if error is None or retries >= MAX_RETRIES or time.perf_counter() - started >= RETRY_BUDGET:
+                break
+            retries += 1
+            stats.retries += 1
+        return Reply(tx.frame, frame, complete, time.perf_counter() - started, False, retries, error)
+
+    def _exchange(self, request, timeout, gap, stats):
+        """
+        Bitta yuborish. Moslashuvchan zaxira tugab javob boshlanmasa:
+          - hozirgacha javob berib turgan stansiya (responses > 0, failures == 0) sekinlashgan bo'lishi
+            mumkin - RESPONSE_TIMEOUT gacha kutiladi; kechikkan javob shu so'rovniki
+            (shinada boshqa so'rov yo'q) va yangi RTT o'lchovi sifatida olinadi;
+          - javob bermay turgan stansiyada liniya tinchigunicha bo'shatiladi.
+        Shunday qilib kechikkan javob keyingi so'rovga hech qachon berilmaydi.
+        """
+        started = time.perf_counter()
+        self.port.reset_input_buffer()       # oldingi so'rovdan kechikkan baytlar
+        self.port.write(request)
+        if self.capture is not None:
+            self.capture.write(TX, request)
+        frame, complete = self._receive(request, time.monotonic() + timeout, gap, stats)
+        if not frame and stats.responses and not stats.failures and timeout < cnet.RESPONSE_TIMEOUT:
+            deadline = time.monotonic() + cnet.RESPONSE_TIMEOUT - (time.perf_counter() - started)
+            frame, complete = self._receive(request, deadline, gap, stats)
+            if frame:
+                stats.late += 1
+        elif not frame:
+            self._settle(gap, stats)
+        rtt = time.perf_counter() - started
+        if complete:
+            residual = rtt - (len(request) + len(frame)) * self.char_time
+            stats.estimator.sample(residual)
+            self.bus.sample(residual)
+        elif not frame:
+            stats.estimator.timed_out()
+        return frame, complete, rtt
+
+    def _receive(self, request, deadline, gap, stats):
+        """
+        deadline gacha shu so'rovga mos javob; boshqa stansiya / buyruq kadri tashlanadi.
+        BCC si buzilgan kadr tashlanmaydi: stansiya baytining o'zi buzilgan bo'lishi
+        mumkin, _transact uni darhol qayta yuboradi.
+        """
+        use_bcc = cnet.frame_uses_bcc(request)
+        while True:
+            frame, complete = cnet.read_frame(self.port, use_bcc, max(0.0, deadline - time.monotonic()), gap)
+            if self.capture is not None and frame:
+                self.capture.write(RX, frame)
+            if not complete or cnet.reply_matches(request, frame) or (use_bcc and not cnet.bcc_valid(frame)):
+                return frame, complete
+            stats.stale += 1
+
+    def _settle(self, gap, stats):
+        """Liniyadagi kechikkan baytlarni gap davomida jimlik bo'lguncha o'qib tashlash"""
+        quiet = gap if gap is not None else MIN_GAP
+        limit = time.monotonic() + cnet.RESPONSE_TIMEOUT
+        last = time.monotonic()
+        dropped = False
+        while time.monotonic() - last < quiet and time.monotonic() < limit:
+            if self.port.read(self.port.in_waiting or 1):
+                last = time.monotonic()
+                dropped = True
+        if dropped:
+            stats.stale += 1
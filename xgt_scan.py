@@ -0,0 +1,276 @@
+# ------------------------------------------------------------
+# Davriy so'rov (polling) rejalashtiruvchisi: har bir teg o'z
+# davri bilan o'qiladi, bir vaqtda kelganlar bitta rejaga jamlanadi.
+# Bu modul GUI ga bog'liq emas.
+# ------------------------------------------------------------
+import threading
+import time
+
+MAX_STRETCH = 8          # sekin sinf davri ko'pi bilan shuncha marta cho'ziladi
+ADAPT_INTERVAL = 1.0     # yuklamani baholash oralig'i (s)
+
+
+class ScanTag:
+    def __init__(self, address, period):
+        self.address = address
+        self.period = period              # asosiy davr (s)
+        self.next_due = 0.0
+        self.reads = 0
+        self.overruns = 0                 # o'tkazib yuborilgan davrlar
+        self.overruns_last = 0
+        self.skipped = 0                  # port yo'qligida bajarilmagan davrlar
+        self.last_read = None
+        self.avg_interval = None          # o'qishlar orasidagi silliqlangan vaqt
+
+
+class ScanScheduler:
+    """
+    Fon rejimida teglarni o'z davri bilan o'qish.
+    plan_func(addresses) -> so'rovlar ro'yxati, execute(plan) ularni yuboradi.
+    execute False qaytarsa (masalan port yo'q) reja bajarilmagan hisoblanadi:
+    o'qishlar va tezlik statistikasi oshmaydi, teglar keyingi davrga o'tadi.
+    Liniya ulgurmasa, tez teglar emas, eng sekin sinfning davri cho'ziladi.
+    plan_func yoki execute dagi istisno siklni to'xtatmaydi: on_error(exc) ga
+    beriladi, navbatdagi teglar o'qilmagan hisoblanib keyingi davrga o'tkaziladi.
+    """
+
+    def __init__(self, plan_func, execute, tick=0.005, on_error=None):
+        self.plan_func = plan_func
+        self.execute = execute
+        self.tick = tick
+        self.on_error = on_error
+        self.errors = 0
+        self.last_error = None
+        self.tags = {}
+        self.stretch = {}                 # asosiy davr -> cho'zish koeffitsienti
+        self.lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._busy = 0.0
+        self._window_start = time.monotonic()
+        self._window_fast_overruns = 0
+
+    # ---------- Sozlash ----------
+    def set_tags(self, periods):
+        """periods: {manzil: davr (s)}"""
+        with self.lock:
+            now = time.monotonic()
+            old = self.tags
+            self.tags = {}
+            for addr, period in periods.items():
+                if not addr:
+                    continue
+                tag = old.get(addr)
+                if tag is None or tag.period != period:
+                    tag = ScanTag(addr, period)
+                    tag.next_due = now
+                self.tags[addr] = tag
+            self.stretch = {p: self.stretch.get(p, 1) for p in {t.period for t in self.tags.values()}}
+
+    def effective_period(self, tag):
+        return tag.period * self.stretch.get(tag.period, 1)
+
+    # ---------- Ishga tushirish / to'xtatish ----------
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2)
+        self._thread = None
+
+    # ---------- Asosiy sikl ----------
+    def _run(self):
+        while not self._stop.is_set():
+            now = time.monotonic()
+            with self.lock:
+                due = [t for t in self.tags.values() if t.next_due <= now]
+                if not due:
+                    wait = min((t.next_due for t in self.tags.values()), default=now + 0.1) - now
+            if not due:
+                self._stop.wait(max(self.tick, min(wait, 0.1)))
+                continue
+
+            # Tez teglar birinchi: rejada ular oldinroq yuboriladi
+            due.sort(key=lambda t: t.period)
+            started = time.monotonic()
+            try:
+                executed = self.execute(self.plan_func([t.address for t in due]))
+            except Exception as e:
+                self._failed(due, e)
+                continue
+            if executed is False:
+                self._skip(due)
+                self._stop.wait(self.tick)
+                continue
+            done = time.monotonic()
+            self._busy += done - started
+
+            with self.lock:
+                fastest = min(t.period for t in self.tags.values()) if self.tags else 0
+                for tag in due:
+                    self._account(tag, done)
+                    if tag.period == fastest and tag.overruns_last:
+                        self._window_fast_overruns += tag.overruns_last
+                if done - self._window_start >= ADAPT_INTERVAL:
+                    self._adapt(done)
+
+    def _failed(self, due, error):
+        """Sikl davom etadi; xato takrorlansa ham har davrda bir martadan oshmaydi"""
+        now = time.monotonic()
+        with self.lock:
+            self.errors += 1
+            self.last_error = error
+            for tag in due:
+                tag.next_due = now + self.effective_period(tag)
+        if self.on_error is not None:
+            try:
+                self.on_error(error)
+            except Exception:
+                pass
+
+    def _skip(self, due):
+        now = time.monotonic()
+        with self.lock:
+            for tag in due:
+                tag.skipped += 1
+                tag.next_due = now + self.effective_period(tag)
+                # Uzilishdan keyingi birinchi o'qish tezlikni buzmasligi uchun qaytadan
+                tag.last_read = tag.avg_interval = None
+
+    def _account(self, tag, done):
+        if tag.last_read is not None:
+            interval = done - tag.last_read
+            tag.avg_interval = interval if tag.avg_interval is None else 0.8 * tag.avg_interval + 0.2 * interval
+        tag.last_read = done
+        tag.reads += 1
+
+        period = self.effective_period(tag)
+        tag.next_due += period
+        missed = 0
+        if tag.next_due < done:
+            missed = int((done - tag.next_due) // period) + 1
+            tag.next_due += missed * period
+        tag.overruns += missed
+        tag.overruns_last = missed
+
+    def _adapt(self, now):
+        """Yuklama yuqori bo'lsa sekin sinflarni cho'zish, pasaysa qaytarish"""
+        load = self._busy / max(now - self._window_start, 1e-6)
+        classes = sorted(self.stretch)            # tezdan sekinga
+        slow = classes[1:]
+        if slow and (self._window_fast_overruns or load > 0.9):
+            # Eng sekin, hali maksimumga yetmagan sinf cho'ziladi
+            for period in reversed(slow):
+                if self.stretch[period] < MAX_STRETCH:
+                    self.stretch[period] *= 2
+                    break
+        elif load < 0.6:
+            for period in classes:
+                if self.stretch[period] > 1:
+                    self.stretch[period] //= 2
+                    break
+        self._busy = 0.0
+        self._window_fast_overruns = 0
+        self._window_start = now
+
+    # ---------- Diagnostika ----------
+    def stats(self):
+        """{manzil: {'period_ms', 'effective_ms', 'rate_hz', 'reads', 'overruns', 'skipped'}}"""
+        with self.lock:
+            result = {}
+            for addr, tag in self.tags.items():
+                rate = 1.0 / tag.avg_interval if tag.avg_interval else 0.0
+                result[addr] = {
+                    "period_ms": round(tag.period * 1000),
+                    "effective_ms": round(self.effective_period(tag) * 1000),
+                    "rate_hz": round(rate, 1),
+                    "reads": tag.reads,
+                    "overruns": tag.overruns,
+                    "skipped": tag.skipped,
+                }
+            return result
+
+
+# ------------------------------------------------------------
+# O'zgarishni aniqlash: har bir teg uchun oxirgi xabar qilingan qiymat.
+# Deadband dan kichik o'zgarishlar vidjetlarga yuborilmaydi, lekin
+# max_interval o'tganda qiymat baribir bir marta yuboriladi.
+# ------------------------------------------------------------
+class Deadband:
+    def __init__(self, band=0.0, percent=False, max_interval=None):
+        self.band = band                  # mutlaq birlik yoki oxirgi qiymatning foizi
+        self.percent = percent
+        self.max_interval = max_interval  # s; None - faqat o'zgarishda
+        self.last_value = None
+        self.last_report = 0.0
+        self.reported = 0
+        self.suppressed = 0
+
+    def changed(self, value):
+        if self.last_value is None:
+            return True
+        delta = abs(value - self.last_value)
+        if self.percent:
+            return delta > abs(self.last_value) * self.band / 100.0 or (self.last_value == 0 and delta > 0)
+        return delta > self.band if self.band else delta != 0
+
+
+class ChangeFilter:
+    """
+    accept(tag, value) -> True bo'lsa qiymat vidjetga yuboriladi.
+    Sozlanmagan teglar uchun standart deadband (aniq o'zgarish) ishlatiladi.
+    """
+
+    def __init__(self, band=0.0, percent=False, max_interval=2.0):
+        self.default = (band, percent, max_interval)
+        self.tags = {}
+        self.lock = threading.Lock()
+
+    def configure(self, tag, band=0.0, percent=False, max_interval=None):
+        with self.lock:
+            old = self.tags.get(tag)
+            entry = self.tags[tag] = Deadband(band, percent, max_interval if max_interval is not None else self.default[2])
+            if old is not None:
+                entry.reported, entry.suppressed = old.reported, old.suppressed
+
+    def accept(self, tag, value, now=None):
+        if now is None:
+            now = time.monotonic()
+        with self.lock:
+            entry = self.tags.get(tag)
+            if entry is None:
+                entry = self.tags[tag] = Deadband(*self.default)
+            stale = entry.max_interval is not None and now - entry.last_report >= entry.max_interval
+            if entry.changed(value) or stale:
+                entry.last_value = value
+                entry.last_report = now
+                entry.reported += 1
+                return True
+            entry.suppressed += 1
+            return False
+
+    def reset(self):
+        """Qayta ulanishda: keyingi har bir qiymat albatta yuboriladi"""
+        with self.lock:
+            for entry in self.tags.values():
+                entry.last_value = None
+
+    @property
+    def suppressed(self):
+        with self.lock:
+            return sum(e.suppressed for e in self.tags.values())
+
+    def stats(self):
+        """{teg: {'reported', 'suppressed'}}"""
+        with self.lock:
+            return {tag: {"reported": e.reported, "suppressed": e.suppressed} for tag, e in self.tags.items()}
@@ -0,0 +1,438 @@
+# ------------------------------------------------------------
+# XGT Cnet PLC simulyatori. Pseudo-terminal (pty) ochadi va
+# build_xgt_frame yaratadigan kadrlarga PLC kabi javob beradi:
+# RSS/WSS, RSB/WSB, monitor X/Y, BCC bilan va BCCsiz.
+#
+#   python xgt_sim.py --baud 115200 --scan-ms 5 --set %MW210=500
+#   -> "PTY: /dev/pts/7" chiqadi, dasturda port sifatida shu yo'l yoziladi
+#
+# Windows da pty yo'q: u holda --tcp 4001 bilan ishga tushirib,
+# dasturda tcp://127.0.0.1:4001 ko'rsatiladi. Bu modul GUI ga bog'liq emas.
+# ------------------------------------------------------------
+import argparse
+import os
+import random
+import re
+import select
+import socket
+import sys
+import threading
+import time
+
+import xgt_cnet as cnet
+
+AREAS = "MDP"
+TYPE_SIZE = {"X": 1, "B": 1, "W": 2, "D": 4, "L": 8}   # javobdagi bayt soni
+MAX_NAME_LEN = 16
+DEFAULT_WORDS = 32768
+
+_VAR = re.compile(r"^%([A-Z])([XBWDL])(\d+)$")
+
+
+class CnetError(Exception):
+    """PLC NAK qaytaradigan holat; args[0] - 4 belgili xato kodi"""
+
+
+class PlcMemory:
+    """%M/%D/%P sohalari: har biri little-endian bayt massivi"""
+
+    def __init__(self, words=DEFAULT_WORDS):
+        self.areas = {area: bytearray(words * 2) for area in AREAS}
+
+    def locate(self, name):
+        """'%MW100' -> (soha bufer, bayt ofset, tur, o'lcham)"""
+        m = _VAR.match(name)
+        if not m:
+            if not name.startswith("%") or len(name) < 4:
+                raise CnetError("0011")
+            if name[2] not in TYPE_SIZE:
+                raise CnetError("0007")
+            raise CnetError("0011")
+        area, kind, index = m.group(1), m.group(2), int(m.group(3))
+        if area not in self.areas:
+            raise CnetError("1132")
+        size = TYPE_SIZE[kind]
+        offset = index // 8 if kind == "X" else index * size
+        return self.areas[area], offset, kind, size, index
+
+    def read(self, name, count=1):
+        mem, offset, kind, size, index = self.locate(name)
+        if kind == "X":
+            if count != 1 or offset >= len(mem):
+                raise CnetError("7132")
+            return f"{(mem[offset] >> (index % 8)) & 1:02X}"
+        end = offset + size * count
+        if end > len(mem):
+            raise CnetError("7132")
+        return "".join(f"{int.from_bytes(mem[o:o + size], 'little'):0{size * 2}X}"
+                       for o in range(offset, end, size))
+
+    def write(self, name, data_hex, count=1):
+        mem, offset, kind, size, index = self.locate(name)
+        if len(data_hex) != size * 2 * count:
+            raise CnetError("1234")
+        try:
+            values = [int(data_hex[i:i + size * 2], 16) for i in range(0, len(data_hex), size * 2)]
+        except ValueError:
+            raise CnetError("1432")
+        if kind == "X":
+            if offset >= len(mem):
+                raise CnetError("7132")
+            bit = 1 << (index % 8)
+            mem[offset] = (mem[offset] | bit) if values[0] & 1 else (mem[offset] & ~bit)
+            return
+        if offset + size * count > len(mem):
+            raise CnetError("7132")
+        for i, value in enumerate(values):
+            mem[offset + i * size:offset + (i + 1) * size] = value.to_bytes(size, "little")
+
+    def set(self, name, value):
+        _, _, kind, size, _ = self.locate(name)
+        self.write(name, f"{value & ((1 << (size * 8)) - 1):0{size * 2}X}")
+
+
+class _Reader:
+    """So'rov tanasini ketma-ket o'qish (hex uzunliklar va nomlar)"""
+
+    def __init__(self, text):
+        self.text = text
+        self.pos = 0
+
+    def take(self, n):
+        chunk = self.text[self.pos:self.pos + n]
+        if len(chunk) != n:
+            raise CnetError("1234")
+        self.pos += n
+        return chunk
+
+    def hex(self, n=2):
+        try:
+            return int(self.take(n), 16)
+        except ValueError:
+            raise CnetError("1432")
+
+    def name(self):
+        length = self.hex()
+        if length > MAX_NAME_LEN:
+            raise CnetError("0004")
+        return self.take(length)
+
+    def done(self):
+        if self.pos != len(self.text):
+            raise CnetError("1234")
+
+
+class PlcSimulator:
+    """
+    Bitta shinadagi bir yoki bir nechta stansiya. handle(request) to'liq
+    so'rov kadrini oladi va javob kadrini (yoki None - javob yo'q) qaytaradi.
+    """
+
+    def __init__(self, stations=(0,), memory=None, scan_ms=0.0, baud=None,
+                 nak_rate=0.0, nak_codes=None, corrupt_rate=0.0, truncate_rate=0.0, seed=None):
+        self.stations = set(stations)
+        self.memory = memory or PlcMemory()
+        self.scan = scan_ms / 1000.0
+        self.char_time = 10.0 / baud if baud else 0.0     # 8N1: 10 bit / belgi
+        self.nak_rate = nak_rate
+        self.nak_codes = list(nak_codes or cnet.ERROR_CODES)
+        self.corrupt_rate = corrupt_rate                   # javobda bitta bayt buziladi
+        self.truncate_rate = truncate_rate                 # javob o'rtasida uziladi
+        self.random = random.Random(seed)
+        self.monitors = {}                                 # (stansiya, raqam) -> so'rov tanasi
+        self.transactions = 0
+        self.naks = 0
+        self.damaged = 0
+        self._stop = threading.Event()
+
+    # ---------- Kadrni tahlil qilish ----------
+    def handle(self, request):
+        """request: ENQ ... EOT (+BCC). Javob bytes yoki None"""
+        use_bcc = request[3:4].islower()
+        eot = request.find(b"\x04")
+        if use_bcc and cnet.calculate_bcc(request[:eot + 1]).encode("ascii") != request[eot + 1:eot + 3]:
+            return None                        # BCC xato - PLC jim turadi
+        try:
+            station = int(request[1:3])
+        except ValueError:
+            return None
+        if station not in self.stations:
+            return None                        # boshqa stansiyaga
+        self.transactions += 1
+        cmd = chr(request[3])
+        body = request[4:eot].decode("ascii", "replace")
+        head = body[:2]
+        try:
+            if self.nak_rate and self.random.random() < self.nak_rate:
+                raise CnetError(self.random.choice(self.nak_codes))
+            data = self._execute(station, cmd.lower(), body)
+            frame = f"\x06{station:02d}{cmd}{data}\x03"
+        except CnetError as e:
+            self.naks += 1
+            frame = f"\x15{station:02d}{cmd}{head}{e.args[0]}\x03"
+        frame = frame.encode("ascii")
+        if use_bcc:
+            frame += cnet.calculate_bcc(frame).encode("ascii")
+        return self._damage(frame)
+
+    def _damage(self, frame):
+        """Shovqinli liniya: tasodifiy bayt buzilishi yoki uzilish"""
+        if self.corrupt_rate and self.random.random() < self.corrupt_rate:
+            self.damaged += 1
+            i = self.random.randrange(1, len(frame) - 1)
+            return frame[:i] + bytes([frame[i] ^ 0x01]) + frame[i + 1:]
+        if self.truncate_rate and self.random.random() < self.truncate_rate:
+            self.damaged += 1
+            return frame[:self.random.randrange(1, len(frame) - 1)]
+        return frame
+
+    def _execute(self, station, cmd, body):
+        if cmd == "r":
+            return body[:2] + self._read(body[:2], _Reader(body[2:]))
+        if cmd == "w":
+            self._write(body[:2], _Reader(body[2:]))
+            return body[:2]
+        if cmd == "x":
+            slot = _Reader(body).hex()
+            if slot >= cnet.MAX_MONITORS:
+                raise CnetError("0290")
+            if body[2:3] != "R":
+                raise CnetError("0011")
+            self._read(body[3:5], _Reader(body[5:]))    # registratsiyani tekshirish
+            self.monitors[(station, slot)] = body[3:]
+            return body[:2]
+        if cmd == "y":
+            slot = _Reader(body).hex()
+            if slot >= cnet.MAX_MONITORS:
+                raise CnetError("0190")
+            registered = self.monitors.get((station, slot))
+            if registered is None:
+                raise CnetError("0090")
+            return body[:2] + self._read(registered[:2], _Reader(registered[2:]))
+        raise CnetError("0011")
+
+    def _read(self, kind, reader):
+        if kind == "SS":
+            blocks = reader.hex()
+            if not 1 <= blocks <= cnet.MAX_BLOCKS:
+                raise CnetError("0003")
+            names = [reader.name() for _ in range(blocks)]
+            reader.done()
+            types = {_VAR.match(n).group(2) if _VAR.match(n) else None for n in names}
+            if len(types) > 1:
+                raise CnetError("1332")
+            out = [f"{blocks:02X}"]
+            for name in names:
+                data = self.memory.read(name)
+                out.append(f"{len(data) // 2:02X}{data}")
+            return "".join(out)
+        if kind == "SB":
+            name = reader.name()
+            count = reader.hex()
+            reader.done()
+            _, _, vtype, size, _ = self.memory.locate(name)
+            if vtype == "X":
+                raise CnetError("0007")
+            if count * size > cnet.MAX_BLOCK_WORDS * 2:
+                raise CnetError("1232")
+            data = self.memory.read(name, count)
+            return f"01{len(data) // 2:02X}{data}"
+        raise CnetError("0011")
+
+    def _write(self, kind, reader):
+        if kind == "SS":
+            blocks = reader.hex()
+            if not 1 <= blocks <= cnet.MAX_BLOCKS:
+                raise CnetError("0003")
+            items = []
+            for _ in range(blocks):
+                name = reader.name()
+                _, _, _, size, _ = self.memory.locate(name)
+                items.append((name, reader.take(size * 2)))
+            reader.done()
+            for name, data in items:
+                self.memory.write(name, data)
+            return
+        if kind == "SB":
+            name = reader.name()
+            count = reader.hex()
+            _, _, vtype, size, _ = self.memory.locate(name)
+            if count * size > cnet.MAX_BLOCK_WORDS * 2:
+                raise CnetError("1232")
+            data = reader.take(count * size * 2)
+            reader.done()
+            self.memory.write(name, data, count)
+            return
+        raise CnetError("0011")
+
+    # ---------- Oqim (pty / TCP) ----------
+    def split_requests(self, buffer):
+        """Buferdan to'liq so'rovlarni ajratish; (so'rovlar, qolgan bufer)"""
+        requests = []
+        while True:
+            start = buffer.find(b"\x05")
+            if start < 0:
+                return requests, bytearray()
+            eot = buffer.find(b"\x04", start)
+            if eot < 0 or eot < start + 4:
+                return requests, buffer[start:]
+            end = eot + 3 if buffer[start + 3:start + 4].islower() else eot + 1
+            if len(buffer) < end:
+                return requests, buffer[start:]
+            requests.append(bytes(buffer[start:end]))
+            buffer = buffer[end:]
+
+    def respond(self, write, response):
+        """Skan kechikishi + tanlangan baud tezligidagi sim vaqti bilan yozish"""
+        if self.scan:
+            time.sleep(self.scan)
+        if not self.char_time:
+            write(response)
+            return
+        # ~1 ms li bo'laklar: bayt vaqti saqlanadi, lekin sleep aniqligi yetadi
+        chunk = max(1, int(0.001 / self.char_time))
+        for i in range(0, len(response), chunk):
+            part = response[i:i + chunk]
+            time.sleep(len(part) * self.char_time)
+            write(part)
+
+    def serve_fd(self, fd):
+        buffer = bytearray()
+        write = lambda data: os.write(fd, data)
+        while not self._stop.is_set():
+            ready, _, _ = select.select([fd], [], [], 0.2)
+            if not ready:
+                continue
+            try:
+                data = os.read(fd, 4096)
+            except OSError:
+                break
+            if not data:
+                break
+            requests, buffer = self.split_requests(buffer + data)
+            for request in requests:
+                response = self.handle(request)
+                if response is not None:
+                    self.respond(write, response)
+
+    def open_pty(self):
+        """pty ochib, slave yo'lini qaytaradi (dastur shu yo'lga ulanadi)"""
+        import tty
+        master, slave = os.openpty()
+        tty.setraw(master)
+        tty.setraw(slave)
+        self._pty = (master, slave)
+        return os.ttyname(slave)
+
+    def serve_tcp(self, server):
+        server.settimeout(0.2)
+        while not self._stop.is_set():
+            try:
+                conn, _ = server.accept()
+            except socket.timeout:
+                continue
+            conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            threading.Thread(target=self._serve_conn, args=(conn,), daemon=True).start()
+
+    def _serve_conn(self, conn):
+        buffer = bytearray()
+        with conn:
+            conn.settimeout(0.2)
+            while not self._stop.is_set():
+                try:
+                    data = conn.recv(4096)
+                except socket.timeout:
+                    continue
+                except OSError:
+                    break
+                if not data:
+                    break
+                requests, buffer = self.split_requests(buffer + data)
+                for request in requests:
+                    response = self.handle(request)
+                    if response is not None:
+                        self.respond(conn.sendall, response)
+
+    def start_pty(self):
+        """Fon oqimida pty simulyatori; qaytaradi: port yo'li"""
+        path = self.open_pty()
+        threading.Thread(target=self.serve_fd, args=(self._pty[0],), daemon=True).start()
+        return path
+
+    def start_tcp(self, port=0, host="127.0.0.1"):
+        """Fon oqimida TCP simulyatori; qaytaradi: 'tcp://host:port'"""
+        server = socket.socket()
+        server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        server.bind((host, port))
+        server.listen()
+        self._server = server
+        threading.Thread(target=self.serve_tcp, args=(server,), daemon=True).start()
+        return f"tcp://{host}:{server.getsockname()[1]}"
+
+    def stop(self):
+        self._stop.set()
+        for fd in getattr(self, "_pty", ()):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+        if getattr(self, "_server", None) is not None:
+            self._server.close()
+
+
+def parse_assignment(text):
+    """'%MW200=3' yoki '%MW200=0x1F' -> ('%MW200', qiymat)"""
+    name, _, value = text.partition("=")
+    return name.strip().upper(), int(value, 0)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="XGT Cnet PLC simulator (pty or TCP)")
+    parser.add_argument("--stations", default="0", help="comma separated station numbers on the bus, e.g. 0,3,5")
+    parser.add_argument("--tcp", type=int, help="listen on this TCP port instead of a pty")
+    parser.add_argument("--baud", type=int, help="emulate wire time at this baud rate (8N1)")
+    parser.add_argument("--scan-ms", type=float, default=0.0, help="PLC scan delay before each response")
+    parser.add_argument("--nak-rate", type=float, default=0.0, help="probability of injecting a NAK")
+    parser.add_argument("--nak-codes", help="comma separated NAK codes to inject (default: all known)")
+    parser.add_argument("--corrupt-rate", type=float, default=0.0, help="probability of flipping a bit in a response")
+    parser.add_argument("--truncate-rate", type=float, default=0.0, help="probability of cutting a response short")
+    parser.add_argument("--words", type=int, default=DEFAULT_WORDS, help="words per memory area")
+    parser.add_argument("--image", action="append", default=[], metavar="AREA=FILE",
+                        help="load a raw little-endian memory image, e.g. M=mem.bin")
+    parser.add_argument("--set", action="append", default=[], metavar="VAR=VALUE",
+                        help="initial value, e.g. %%MW210=500")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args(argv)
+
+    memory = PlcMemory(args.words)
+    for item in args.image:
+        area, _, path = item.partition("=")
+        with open(path, "rb") as f:
+            data = f.read()
+        mem = memory.areas[area.strip().upper()]
+        mem[:len(data)] = data[:len(mem)]
+    for item in args.set:
+        memory.set(*parse_assignment(item))
+
+    sim = PlcSimulator(
+        stations=[int(s) for s in args.stations.split(",")],
+        memory=memory, scan_ms=args.scan_ms, baud=args.baud,
+        nak_rate=args.nak_rate,
+        nak_codes=args.nak_codes.split(",") if args.nak_codes else None,
+        corrupt_rate=args.corrupt_rate, truncate_rate=args.truncate_rate,
+        seed=args.seed,
+    )
+    if args.tcp is not None:
+        print(f"TCP: {sim.start_tcp(args.tcp, '0.0.0.0').replace('0.0.0.0', '127.0.0.1')}", flush=True)
+    else:
+        print(f"PTY: {sim.start_pty()}", flush=True)
+    try:
+        while True:
+            time.sleep(5)
+            print(f"# {sim.transactions} transactions, {sim.naks} NAK, {sim.damaged} damaged", file=sys.stderr, flush=True)
+    except KeyboardInterrupt:
+        sim.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+# ------------------------------------------------------------
+# Vidjet rasmlari (fixture PNG lar): bir marta yuklash, vidjet o'lchamiga
+# kichraytirish va burilgan spritelarni chegaralangan LRU keshda saqlash.
+# Burish fon oqimida bajariladi; Tk oqimi faqat tayyor rasmni oladi.
+# Bu modul Tk ga bog'liq emas (faqat PIL).
+# ------------------------------------------------------------
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+from PIL import Image
+
+ASSET_DIR = os.path.dirname(os.path.abspath(__file__))
+ANGLE_FIXTURE = "crane_angle_fixture.png"
+SLIDE_FIXTURE = "crane_slide_fixture.png"
+CRANE_BLOCK = "crane_block.png"
+
+# Hamma burish ishlari uchun bitta fon oqimi
+_RENDERER = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sprite")
+
+
+@lru_cache(maxsize=None)
+def load_image(name):
+    """PNG ni bir marta o'qish (RGBA); fayl bo'lmasa OSError"""
+    with Image.open(os.path.join(ASSET_DIR, name)) as im:
+        return im.convert("RGBA")
+
+
+@lru_cache(maxsize=32)
+def fit_image(name, width, height=None, rotate=0):
+    """Rasmni (kerak bo'lsa 90° ga burib) berilgan kenglik/balandlikka kichraytirish"""
+    image = load_image(name)
+    if rotate:
+        image = image.rotate(rotate, expand=True)
+    if height is None:
+        height = max(1, round(image.height * width / image.width))
+    return image.resize((width, height), Image.LANCZOS)
+
+
+class RotatedSprites:
+    """
+    Bitta asosiy rasmning burilgan nusxalari. Burchak resolution (gradus) ga
+    yaxlitlanadi; kesh max_entries dan oshsa eng uzoq ishlatilmagani chiqariladi.
+    """
+
+    def __init__(self, image, resolution=1.0, max_entries=120):
+        self.image = image
+        self.resolution = resolution
+        self.max_entries = max_entries
+        self.cache = OrderedDict()       # kalit -> PIL rasm
+        self.pending = set()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, angle):
+        return round((angle % 360) / self.resolution) % max(1, round(360 / self.resolution))
+
+    def angle_of(self, key):
+        return key * self.resolution
+
+    def get(self, key):
+        """Keshdagi rasm yoki None"""
+        with self.lock:
+            image = self.cache.get(key)
+            if image is None:
+                self.misses += 1
+                return None
+            self.cache.move_to_end(key)
+            self.hits += 1
+            return image
+
+    def request(self, key, callback):
+        """
+        Rasmni fon oqimida tayyorlash; tayyor bo'lgach callback(key) FON oqimida
+        chaqiriladi - Tk ga tegmaydigan bo'lishi kerak (masalan queue.put).
+        """
+        with self.lock:
+            if key in self.cache or key in self.pending:
+                return
+            self.pending.add(key)
+        _RENDERER.submit(self._render, key, callback)
+
+    def render(self, key):
+        """Chaqiruvchi oqimida darhol tayyorlash (boshlang'ich rasm uchun)"""
+        image = self.image.rotate(self.angle_of(key), resample=Image.BICUBIC, expand=True)
+        with self.lock:
+            self.pending.discard(key)
+            self.cache[key] = image
+            while len(self.cache) > self.max_entries:
+                self.cache.popitem(last=False)
+        return image
+
+    def _render(self, key, callback):
+        self.render(key)
+        callback(key)
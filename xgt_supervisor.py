@@ -0,0 +1,146 @@
+# ------------------------------------------------------------
+# Ulanish nazoratchisi: portni (IOWorker) ochadi, yo'qolganini
+# bilgach yopadi va fon oqimida qurilma qaytishini kuzatib turadi.
+# USB-RS485 adapter qayta paydo bo'lishi bilan port ochiladi;
+# ochish xato bersa kutish vaqti eksponensial oshadi. Qayta
+# ulanganda on_connect(io) chaqiriladi - chaqiruvchi monitor
+# ro'yxatlarini bekor qiladi, skan esa to'xtamasdan davom etadi.
+# Bu modul GUI ga bog'liq emas.
+# ------------------------------------------------------------
+import os
+import threading
+import time
+
+from serial.tools import list_ports
+
+import xgt_cnet as cnet
+from xgt_link import IOWorker
+from xgt_transport import open_transport, TCP_PREFIX
+
+PRESENCE_POLL = 0.05     # s: qurilma yo'qligida tekshiruvlar orasidagi vaqt (/dev tuguni)
+ENUM_POLL = 0.5          # s: Windows da - COM ro'yxatini olish (SetupAPI) qimmat
+MIN_DELAY = 0.05         # s: ochish xatosidan keyingi birinchi kutish
+MAX_DELAY = 2.0          # s: kutish shundan oshmaydi (uzilish tugagach ortiqcha kutmaslik)
+
+
+def uses_node(name):
+    """Qurilma /dev tuguni bilan tekshiriladimi (arzon os.path.exists)"""
+    return os.sep == "/" and name.startswith("/")
+
+
+def presence_poll(name):
+    """Qurilma yo'qligida tekshiruvlar orasidagi vaqt"""
+    return PRESENCE_POLL if uses_node(name) else ENUM_POLL
+
+
+def device_present(name):
+    """
+    Qurilma tizimda bormi. Linux / macOS da /dev tuguni, Windows da COM ro'yxati;
+    TCP gateway uchun har doim True (ulanishni ochishning o'zi tekshiradi).
+    """
+    if name.lower().startswith(TCP_PREFIX):
+        return True
+    if uses_node(name):
+        return os.path.exists(name)
+    return any(p.device.lower() == name.lower() for p in list_ports.comports())
+
+
+class PortSupervisor:
+    """
+    io - joriy IOWorker yoki None (uzilgan). Port xatosini ko'rgan har qanday oqim
+    lost(io, error) ni chaqiradi; bir xil io uchun takroriy chaqiruvlar e'tiborsiz.
+    Qayta ochilgach on_connect(io), yo'qolganda on_lost(error) - ikkalasi ham fon
+    oqimida chaqiriladi.
+    """
+
+    def __init__(self, name, baud, capture=None, worker_name="xgt-io",
+                 on_connect=None, on_lost=None):
+        self.name = name
+        self.baud = baud
+        self.capture = capture
+        self.worker_name = worker_name
+        self.on_connect = on_connect
+        self.on_lost = on_lost
+        self.io = None
+        self.lock = threading.Lock()
+        self._closed = threading.Event()
+        self._thread = None
+        self.outages = 0
+        self.attempts = 0                # muvaffaqiyatsiz ochishlar
+        self.lost_at = None
+        self.last_outage = None          # s: oxirgi uzilishdan qayta ulanishgacha
+
+    @property
+    def reconnecting(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def open(self):
+        """Bitta urinish; xato bo'lsa OSError (SerialException ham) chaqiruvchiga chiqadi"""
+        port = open_transport(self.name, self.baud, timeout=cnet.READ_SLICE)
+        io = IOWorker(port, name=self.worker_name, capture=self.capture)
+        with self.lock:
+            if self._closed.is_set():
+                io.close()
+                return None
+            self.io = io
+        return io
+
+    def connect(self):
+        """Port ochilguncha (yoki close() gacha) shu oqimda kutish. Ochildimi - bool"""
+        delay = MIN_DELAY
+        poll = presence_poll(self.name)
+        while not self._closed.is_set():
+            if not device_present(self.name):
+                self._closed.wait(poll)
+                continue
+            try:
+                io = self.open()
+            except OSError:
+                self.attempts += 1
+                self._closed.wait(delay)
+                delay = min(delay * 2, MAX_DELAY)
+                continue
+            if io is None:
+                break
+            if self.lost_at is not None:
+                self.last_outage = time.monotonic() - self.lost_at
+                self.lost_at = None
+            if self.on_connect:
+                self.on_connect(io)
+            return True
+        return False
+
+    def lost(self, io, error):
+        """Port yo'qoldi: yopish va fon oqimida qayta ulanishni boshlash"""
+        with self.lock:
+            if io is not self.io or self._closed.is_set():
+                return
+            self.io = None
+            self.outages += 1
+            self.lost_at = time.monotonic()
+        io.close()               # eski port yopilmaguncha qayta ochilmaydi (Windows da band)
+        if self.on_lost:
+            self.on_lost(error)
+        with self.lock:
+            if not self._closed.is_set():
+                self._thread = threading.Thread(target=self.connect, name="xgt-reconnect", daemon=True)
+                self._thread.start()
+
+    def close(self):
+        """Qayta ulanishni to'xtatib, portni yopish"""
+        self._closed.set()
+        with self.lock:
+            io, self.io = self.io, None
+        if io is not None:
+            io.close()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=2.0)
+
+    def stats(self):
+        return {
+            "connected": self.io is not None,
+            "outages": self.outages,
+            "failed_opens": self.attempts,
+            "last_outage_s": None if self.last_outage is None else round(self.last_outage, 2),
+        }
@@ -0,0 +1,238 @@
+# ------------------------------------------------------------
+# Transport qatlami: Cnet kadrlari serial port yoki Ethernet orqali
+# (serial-device server / gateway, xom TCP soket) yuboriladi.
+# Ikkala backend ham bir xil interfeysga ega:
+#   write(data), read(size), in_waiting, reset_input_buffer(), close(), is_open
+# Bu modul GUI ga bog'liq emas.
+# ------------------------------------------------------------
+import functools
+import socket
+import threading
+import time
+
+import serial
+
+TCP_PREFIX = "tcp://"
+CONNECT_TIMEOUT = 3.0
+KEEPALIVE_IDLE = 10      # s: jim turgan ulanishni tekshirishni boshlash
+KEEPALIVE_INTERVAL = 5   # s: tekshiruvlar orasidagi vaqt
+KEEPALIVE_COUNT = 3      # javobsiz tekshiruvlardan keyin ulanish uziladi
+
+
+def _port_errors(method):
+    """
+    pyserial ning OSError bo'lmagan xatolari (Linux da adapter sug'urilganda
+    tcflush dan termios.error) SerialException ga o'giriladi: chaqiruvchilar
+    port yo'qolishini bitta 'except OSError' bilan ushlaydi.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args):
+        try:
+            return method(self, *args)
+        except OSError:
+            raise
+        except Exception as e:
+            raise serial.SerialException(f"{self.name}: {type(e).__name__}: {e}") from e
+    return wrapper
+
+
+class SerialTransport:
+    """pyserial ustidagi yupqa qatlam; hamma port xatolari OSError (SerialException)"""
+
+    def __init__(self, port, baudrate, timeout=1.5):
+        self.serial = serial.Serial(port, baudrate=baudrate, timeout=timeout)
+        self.name = port
+        self.baudrate = baudrate
+
+    @property
+    def is_open(self):
+        return self.serial.is_open
+
+    @property
+    @_port_errors
+    def in_waiting(self):
+        return self.serial.in_waiting
+
+    @property
+    def timeout(self):
+        return self.serial.timeout
+
+    @timeout.setter
+    @_port_errors
+    def timeout(self, value):
+        self.serial.timeout = value
+
+    @_port_errors
+    def read(self, size=1):
+        return self.serial.read(size)
+
+    @_port_errors
+    def write(self, data):
+        return self.serial.write(data)
+
+    @_port_errors
+    def reset_input_buffer(self):
+        self.serial.reset_input_buffer()
+
+    def close(self):
+        self.serial.close()
+
+
+def _enable_keepalive(sock):
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+    if hasattr(socket, "TCP_KEEPIDLE"):             # Linux
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, KEEPALIVE_IDLE)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, KEEPALIVE_INTERVAL)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPCNT, KEEPALIVE_COUNT)
+    elif hasattr(socket, "SIO_KEEPALIVE_VALS"):     # Windows
+        sock.ioctl(socket.SIO_KEEPALIVE_VALS, (1, KEEPALIVE_IDLE * 1000, KEEPALIVE_INTERVAL * 1000))
+
+
+class TcpPool:
+    """
+    Gateway larga doimiy ulanishlar hovuzi. Transport yopilganda soket yopilmaydi,
+    hovuzga qaytadi; keyingi ochilishda TCP qo'l siqishsiz qayta ishlatiladi.
+    """
+
+    def __init__(self):
+        self.idle = {}           # (host, port) -> [soket, ...]
+        self.lock = threading.Lock()
+        self.connects = 0        # haqiqiy TCP ulanishlar soni
+        self.reuses = 0
+
+    def acquire(self, host, port):
+        with self.lock:
+            sockets = self.idle.get((host, port), [])
+            while sockets:
+                sock = sockets.pop()
+                if _alive(sock):
+                    self.reuses += 1
+                    return sock
+                sock.close()
+        sock = socket.create_connection((host, port), timeout=CONNECT_TIMEOUT)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)   # kichik kadrlar kutmasdan ketadi
+        _enable_keepalive(sock)
+        with self.lock:
+            self.connects += 1
+        return sock
+
+    def release(self, host, port, sock):
+        with self.lock:
+            self.idle.setdefault((host, port), []).append(sock)
+
+    def close_all(self):
+        with self.lock:
+            for sockets in self.idle.values():
+                for sock in sockets:
+                    sock.close()
+            self.idle.clear()
+
+
+def _alive(sock):
+    """Hovuzdagi soket tirikmi: tomonlar yopgan bo'lsa recv b'' qaytaradi"""
+    try:
+        sock.setblocking(False)
+        try:
+            return sock.recv(1, socket.MSG_PEEK) != b""
+        except BlockingIOError:
+            return True
+        finally:
+            sock.setblocking(True)
+    except OSError:
+        return False
+
+
+POOL = TcpPool()
+
+
+class TcpTransport:
+    """Xom TCP soket orqali Cnet (serial-device server). Xatolar OSError sifatida chiqadi."""
+
+    def __init__(self, host, port, timeout=1.5, pool=POOL):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.pool = pool
+        self.name = f"{TCP_PREFIX}{host}:{port}"
+        self.baudrate = None
+        self.sock = pool.acquire(host, port)
+        self.buffer = bytearray()
+
+    @property
+    def is_open(self):
+        return self.sock is not None
+
+    @property
+    def in_waiting(self):
+        self._drain()
+        return len(self.buffer)
+
+    def read(self, size=1):
+        """pyserial kabi: size bayt kelguncha yoki timeout tugaguncha kutadi"""
+        deadline = time.monotonic() + self.timeout
+        while len(self.buffer) < size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            self.sock.settimeout(remaining)
+            try:
+                chunk = self.sock.recv(4096)
+            except socket.timeout:
+                break
+            except OSError:
+                self._discard()
+                raise
+            if not chunk:
+                self._discard()
+                raise ConnectionResetError(f"{self.name}: connection closed by peer")
+            self.buffer += chunk
+        data = bytes(self.buffer[:size])
+        del self.buffer[:size]
+        return data
+
+    def write(self, data):
+        try:
+            self.sock.sendall(data)
+        except OSError:
+            self._discard()
+            raise
+        return len(data)
+
+    def reset_input_buffer(self):
+        self._drain()
+        self.buffer.clear()
+
+    def close(self):
+        if self.sock is not None:
+            self.buffer.clear()
+            self.pool.release(self.host, self.port, self.sock)
+            self.sock = None
+
+    def _drain(self):
+        """Soketda tayyor turgan hamma narsani bloklamasdan buferga olish"""
+        self.sock.setblocking(False)
+        try:
+            while True:
+                chunk = self.sock.recv(4096)
+                if not chunk:
+                    self._discard()
+                    raise ConnectionResetError(f"{self.name}: connection closed by peer")
+                self.buffer += chunk
+        except BlockingIOError:
+            pass
+        finally:
+            if self.sock is not None:
+                self.sock.setblocking(True)
+
+    def _discard(self):
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+
+
+def open_transport(name, baudrate=115200, timeout=1.5):
+    """'COM10' / '/dev/ttyUSB0' -> serial, 'tcp://192.168.0.50:4001' -> TCP gateway"""
+    if name.lower().startswith(TCP_PREFIX):
+        host, _, port = name[len(TCP_PREFIX):].rpartition(":")
+        return TcpTransport(host, int(port), timeout)
+    return SerialTransport(name, baudrate, timeout)
@@ -0,0 +1,93 @@
+# ------------------------------------------------------------
+# Javobdagi ASCII hex ma'lumotni NumPy massiviga bitta vektorli
+# o'tishda o'girish va XGT turlari bo'yicha ko'rinishlar.
+#
+# Cnet da har bir element hex matnda katta-endian yoziladi ("1234" = 0x1234),
+# PLC xotirasida esa word lar little-endian tartibda: %MD10 = %MW20 (past)
+# + %MW21 (yuqori). Shuning uchun word massivi little-endian saqlanadi va
+# D/L ko'rinishlari to'g'ridan-to'g'ri .view() bilan olinadi (nusxasiz).
+# Bu modul GUI ga bog'liq emas.
+# ------------------------------------------------------------
+import numpy as np
+
+# Element turi -> hex matndagi bayt soni va ishorasiz dtype
+ELEMENT_DTYPES = {
+    "X": np.dtype("u1"),
+    "B": np.dtype("u1"),
+    "W": np.dtype("<u2"),
+    "D": np.dtype("<u4"),
+    "L": np.dtype("<u8"),
+}
+
+# Word massivi ustidagi ruxsat etilgan ko'rinishlar
+VIEWS = {
+    "u16": np.dtype("<u2"),
+    "i16": np.dtype("<i2"),
+    "u32": np.dtype("<u4"),
+    "i32": np.dtype("<i4"),
+    "f32": np.dtype("<f4"),
+    "i64": np.dtype("<i8"),
+    "f64": np.dtype("<f8"),
+}
+
+
+def hex_bytes(payloads):
+    """Bitta hex matn yoki ularning ro'yxati -> bytes (bytes.fromhex, C da bitta o'tish)"""
+    if isinstance(payloads, (bytes, bytearray, memoryview)):
+        payloads = bytes(payloads).decode("ascii")
+    elif not isinstance(payloads, str):
+        payloads = "".join(p.decode("ascii") if isinstance(p, (bytes, bytearray)) else p for p in payloads)
+    return bytes.fromhex(payloads)
+
+
+def decode_elements(payloads, vtype="W"):
+    """
+    Hex ma'lumot -> ishorasiz elementlar massivi (X/B: u8, W: u16, D: u32, L: u64).
+    payloads: bitta blok yoki bir nechta javob bloklari ro'yxati.
+    """
+    dtype = ELEMENT_DTYPES[vtype]
+    raw = hex_bytes(payloads)
+    if len(raw) % dtype.itemsize:
+        raise ValueError(f"{len(raw)} bytes is not a whole number of {vtype} elements")
+    # Matndagi katta-endian qiymatlar -> xotiradagi little-endian
+    return np.frombuffer(raw, dtype.newbyteorder(">")).astype(dtype)
+
+
+def decode_words(payloads):
+    """rSB / monitor / xotira dump javoblari -> little-endian uint16 word massivi"""
+    return decode_elements(payloads, "W")
+
+
+def decode_uniform(values):
+    """
+    Bir xil uzunlikdagi hex qiymatlar ro'yxati (split_read_blocks natijasi) ->
+    ishorasiz sonlar massivi. Uzunliklar har xil bo'lsa ValueError.
+    """
+    if not values:
+        return np.zeros(0, "<u2")
+    width = len(values[0])
+    if any(len(v) != width for v in values):
+        raise ValueError("Mixed element sizes")
+    vtype = {2: "B", 4: "W", 8: "D", 16: "L"}.get(width)
+    if vtype is None:
+        raise ValueError(f"Unsupported element width: {width} hex chars")
+    return decode_elements(values, vtype)
+
+
+def view(words, kind):
+    """
+    Word massivi ustida turli ko'rinish: 'u16', 'i16', 'u32', 'i32', 'f32', 'i64', 'f64'.
+    D/L uchun qo'shni word lar XGT tartibida (pastki word oldin) birlashadi.
+    """
+    dtype = VIEWS[kind]
+    words = np.ascontiguousarray(words, dtype="<u2")
+    per = dtype.itemsize // 2
+    if len(words) % per:
+        raise ValueError(f"{len(words)} words do not divide into {kind} values")
+    return words.view(dtype)
+
+
+def view_at(words, offset, kind):
+    """Bitta qiymat: offset (word) dan boshlab kind turida"""
+    per = VIEWS[kind].itemsize // 2
+    return view(words[offset:offset + per], kind)[0]